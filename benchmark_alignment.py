@@ -0,0 +1,95 @@
+import argparse
+import time
+import cv2
+import numpy as np
+
+from libs.logsheet_config import LogsheetConfig
+from libs.pdf_to_image import convert_pdf_to_image, resize_image
+from libs.processing.align_images import find_corners
+
+
+def compute_homography(scanned_corners, template_corners):
+    h, _ = cv2.findHomography(np.array(scanned_corners, dtype=np.float32), np.array(template_corners, dtype=np.float32))
+    return h
+
+
+def max_displacement(h1, h2, width, height, steps=9):
+    """Compute maximal distance between points of a regular grid mapped by two homographies
+
+    Args:
+        h1 (np.array): first homography
+        h2 (np.array): second homography
+        width (int): width of the image
+        height (int): height of the image
+        steps (int, optional): number of grid points in each direction. Defaults to 9.
+
+    Returns:
+        float: maximal displacement in pixels
+    """
+    grid = np.array([[x, y] for x in np.linspace(0, width, steps) for y in np.linspace(0, height, steps)], dtype=np.float32)
+    points_1 = cv2.perspectiveTransform(grid[None], h1)[0]
+    points_2 = cv2.perspectiveTransform(grid[None], h2)[0]
+    return float(np.max(np.linalg.norm(points_1 - points_2, axis=1)))
+
+
+def measure(scanned, template, filter_grayscale, downscale, repeat):
+    """Find corners in both images, report the best time out of several runs
+
+    Args:
+        scanned (np.array): scanned image
+        template (np.array): template image
+        filter_grayscale (bool): keep only the darkest pixels
+        downscale (int): factor of downscaling used for corner detection
+        repeat (int): number of runs
+
+    Returns:
+        tuple: homography (None if corners are not valid) and time in seconds
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        template_corners, template_valid = find_corners(template, filter_grayscale, downscale=downscale)
+        scanned_corners, scanned_valid = find_corners(scanned, filter_grayscale, downscale=downscale)
+        best = min(best, time.perf_counter() - start)
+
+    if not (template_valid and scanned_valid):
+        return None, best
+    return compute_homography(scanned_corners, template_corners), best
+
+
+def main(scanned_logsheet, template, config_file, page, filter_grayscale, downscale, repeat):
+    config = LogsheetConfig([], [])
+    config.import_from_json(config_file)
+    size = (config.width, config.height)
+
+    scanned = resize_image(np.array(convert_pdf_to_image(scanned_logsheet, page=page)), size)
+    template = resize_image(np.array(convert_pdf_to_image(template)), size)
+
+    h_full, time_full = measure(scanned, template, filter_grayscale, 1, repeat)
+    h_pyramid, time_pyramid = measure(scanned, template, filter_grayscale, downscale, repeat)
+
+    print(f'full resolution: {time_full * 1000:.1f} ms, corners valid: {h_full is not None}')
+    print(f'downscaled {downscale}x: {time_pyramid * 1000:.1f} ms, corners valid: {h_pyramid is not None}')
+    if h_full is not None and h_pyramid is not None:
+        print(f'maximal displacement between alignments: {max_displacement(h_full, h_pyramid, *size):.1f} px')
+
+
+if __name__ == '__main__':
+    args_parser = argparse.ArgumentParser(description='Compare speed and accuracy of full resolution and downscaled alignment.')
+
+    args_parser._action_groups.pop()
+    required = args_parser.add_argument_group('required arguments')
+    optional = args_parser.add_argument_group('optional arguments')
+
+    required.add_argument('--pdf_logsheet', type=str, required=True, help='Scanned logsheet in PDF format')
+    required.add_argument('--pdf_template', type=str, required=True, help='PDF template of the logsheet')
+    required.add_argument('--config_file', type=str, required=True, help='Path to JSON file containing config')
+
+    optional.add_argument('--page', type=int, default=0, help='Page of the scanned logsheet (e.g. 1 for backside).')
+    optional.add_argument('--filter_grayscale', action=argparse.BooleanOptionalAction, default=False, help='During the alignment step, keep only the darkest pixels in grayscale.')
+    optional.add_argument('--alignment_downscale', type=int, default=4, help='Factor of downscaling compared to full resolution.')
+    optional.add_argument('--repeat', type=int, default=5, help='Number of runs, the best time is reported.')
+
+    args = args_parser.parse_args()
+
+    main(args.pdf_logsheet, args.pdf_template, args.config_file, args.page, args.filter_grayscale, args.alignment_downscale, args.repeat)
@@ -0,0 +1,109 @@
+import argparse
+import time
+import warnings
+from itertools import permutations
+
+from libs.logsheet_config import LogsheetConfig
+from libs.processing.rtree import Ensemble
+from libs.processing.process_area import align_pairwise, separate_to_lines, align_lines, filter_exceeding_words, remove_non_ascii
+from libs.services.registry import SERVICES
+from libs.services.replay_vision import load_recordings, replay_clients
+
+
+def reference_align(string_1, string_2):
+    # the former backend, enumerates all optimal alignments
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        from Bio import pairwise2
+    return pairwise2.align.globalxs(string_1, string_2, -3, -1, gap_char=' ')[0][0]
+
+
+def collect_pairs(identified_content, config):
+    """Collect pairs of lines aligned during consensus voting
+
+    Args:
+        identified_content (dict): identified rectangles per service
+        config (LogsheetConfig): configuration of given logsheet
+
+    Returns:
+        list: pairs of strings
+    """
+    ensemble = Ensemble(identified_content, config)
+    pairs = []
+    for region in config.regions:
+        candidates = ensemble.find_intersection(region.get_coords())
+        if region.content_type not in ['Handwritten', 'Number']:
+            continue
+
+        candidate_lines = []
+        for rectangles in candidates.values():
+            if rectangles:
+                lines = separate_to_lines(rectangles)
+                for line in lines:
+                    line.sort()
+                candidate_lines.append(lines)
+
+        for group in align_lines(candidate_lines):
+            lines = [remove_non_ascii(' '.join(rectangle.content for rectangle in line)) for line in filter_exceeding_words(group, region)]
+            pairs += permutations(filter(None, lines), 2)
+    return pairs
+
+
+def measure(function, pairs, repeat):
+    """Align all pairs, report the best time out of several runs
+
+    Args:
+        function (callable): alignment function
+        pairs (list): pairs of strings
+        repeat (int): number of runs
+
+    Returns:
+        tuple: aligned strings and time in seconds
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        aligned = [function(string_1, string_2) for string_1, string_2 in pairs]
+        best = min(best, time.perf_counter() - start)
+    return aligned, best
+
+
+def main(replay_file, logsheets, config_files, repeat):
+    recordings = load_recordings(replay_file)
+
+    pairs = []
+    for logsheet, config_file in zip(logsheets, config_files):
+        config = LogsheetConfig([], [])
+        config.import_from_json(config_file)
+        clients = replay_clients(recordings, logsheet, SERVICES)
+        pairs += collect_pairs({name: client.identify(None, config) for name, client in clients.items()}, config)
+
+    reference, time_reference = measure(reference_align, pairs, repeat)
+    aligned, time_aligned = measure(align_pairwise, pairs, repeat)
+
+    print(f'{len(pairs)} pairs of lines')
+    print(f'pairwise2: {time_reference * 1000:.1f} ms')
+    print(f'PairwiseAligner: {time_aligned * 1000:.1f} ms ({time_reference / max(time_aligned, 1e-9):.1f}x faster)')
+    # equally good alignments may differ in placement of gaps
+    print(f'identical alignments: {sum(a == b for a, b in zip(reference, aligned))}/{len(pairs)}')
+
+
+if __name__ == '__main__':
+    args_parser = argparse.ArgumentParser(description='Compare speed of string alignment backends used in consensus voting.')
+
+    args_parser._action_groups.pop()
+    required = args_parser.add_argument_group('required arguments')
+    optional = args_parser.add_argument_group('optional arguments')
+
+    required.add_argument('--replay_file', type=str, required=True, help='Recorded outputs of OCR services (e.g. tests/extracted_content.py)')
+    required.add_argument('--replay_logsheet', type=str, nargs='+', required=True, help='Names of the recorded logsheets (e.g. CTD CTD_back)')
+    required.add_argument('--config_file', type=str, nargs='+', required=True, help='Path to JSON file containing config of each logsheet')
+
+    optional.add_argument('--repeat', type=int, default=5, help='Number of runs, the best time is reported.')
+
+    args = args_parser.parse_args()
+
+    if len(args.replay_logsheet) != len(args.config_file):
+        args_parser.error('Each --replay_logsheet requires its --config_file.')
+
+    main(args.replay_file, args.replay_logsheet, args.config_file, args.repeat)
@@ -0,0 +1,292 @@
+import os
+import json
+import hashlib
+import threading
+import tempfile
+import numpy as np
+from shutil import rmtree
+
+from libs.processing.align_images import prepare_template, compute_features
+from libs.region import WordBoxes
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'formHTR')
+
+
+def hash_file(path, chunk_size=2**20):
+    """Compute SHA-256 hash of file content
+
+    Args:
+        path (str): path to the file
+        chunk_size (int, optional): size of chunks read at once. Defaults to 1 MB.
+
+    Returns:
+        str: hexadecimal digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def entry_size(path):
+    """Compute size of cache entry (file or directory)
+
+    Args:
+        path (str): path to the entry
+
+    Returns:
+        int: size in bytes
+    """
+    if os.path.isdir(path):
+        return sum(entry_size(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+class DiskCache:
+    """
+    Size-bounded directory of cache entries with LRU eviction.
+    Each entry is a file or a directory named by its key.
+    """
+    def __init__(self, directory, max_size):
+        """
+        Args:
+            directory (str): location of the cache
+            max_size (float): maximal size of the cache in MB
+        """
+        self.directory = directory
+        self.max_size = max_size * 2**20
+        os.makedirs(directory, exist_ok=True)
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key)
+
+    def lookup(self, key):
+        """Find existing entry and mark it as recently used
+
+        Args:
+            key (str): entry identifier
+
+        Returns:
+            str: path to the entry or None if not present
+        """
+        path = self.entry_path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def store(self, key, write):
+        """Atomically create new entry and evict old entries if needed
+
+        Args:
+            key (str): entry identifier
+            write (callable): function filling given temporary directory with entry content
+
+        Returns:
+            str: path to the entry
+        """
+        path = self.entry_path(key)
+        tmp_path = tempfile.mkdtemp(dir=self.directory, prefix='.tmp_')
+        try:
+            write(tmp_path)
+            os.rename(tmp_path, path)
+        except OSError:
+            # entry was created concurrently by another process
+            rmtree(tmp_path, ignore_errors=True)
+        self.evict()
+        return path
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits its maximal size"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.startswith('.tmp_'):
+                continue
+            path = self.entry_path(name)
+            try:
+                entries.append((os.path.getmtime(path), entry_size(path), path))
+            except FileNotFoundError:
+                continue
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            if os.path.isdir(path):
+                rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+            total -= size
+
+
+class TemplateCache(DiskCache):
+    """
+    Cache of rasterized and resized templates together with their detected corners.
+    """
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_size=512):
+        super().__init__(os.path.join(directory, 'templates'), max_size)
+
+    def load(self, template, size, filter_grayscale, dpi=300, downscale=1):
+        """Load template image and its corners, compute them if not cached yet
+
+        Args:
+            template (str): path to PDF template
+            size ((int, int)): target width and height of the image
+            filter_grayscale (bool): keep only the darkest pixels in grayscale during corner detection
+            dpi (int, optional): quality of picture in DPI. Defaults to 300.
+            downscale (int, optional): factor of downscaling used for corner detection. Defaults to 1.
+
+        Returns:
+            tuple: memory-mapped template image, its corners and their validity
+        """
+        width, height = size
+        key = f'{hash_file(template)}_{dpi}_{width}x{height}_{int(filter_grayscale)}_{downscale}'
+
+        path = self.lookup(key)
+        if path is None:
+            image, corners, valid = prepare_template(template, size, filter_grayscale, dpi=dpi, downscale=downscale)
+
+            def write(directory):
+                np.save(os.path.join(directory, 'image.npy'), image)
+                with open(os.path.join(directory, 'corners.json'), 'w') as f:
+                    json.dump({'corners': [[int(x), int(y)] for x, y in corners], 'valid': valid}, f)
+
+            self.store(key, write)
+            return image, corners, valid
+
+        with open(os.path.join(path, 'corners.json'), 'r') as f:
+            data = json.load(f)
+        image = np.load(os.path.join(path, 'image.npy'), mmap_mode='r')
+        return image, [tuple(corner) for corner in data['corners']], data['valid']
+
+    def load_features(self, template, image, dpi=300):
+        """Load keypoints and descriptors of template image, compute them if not cached yet
+
+        Args:
+            template (str): path to PDF template
+            image (np.array): rasterized and resized template
+            dpi (int, optional): quality of picture in DPI. Defaults to 300.
+
+        Returns:
+            tuple: coordinates of keypoints and their descriptors
+        """
+        height, width = image.shape[:2]
+        key = f'{hash_file(template)}_{dpi}_{width}x{height}_features'
+
+        path = self.lookup(key)
+        if path is None:
+            points, descriptors = compute_features(image)
+            # template without keypoints, nothing to store (np.save would write an object array)
+            if descriptors is None:
+                return points, descriptors
+
+            def write(directory):
+                np.save(os.path.join(directory, 'points.npy'), points)
+                np.save(os.path.join(directory, 'descriptors.npy'), descriptors)
+
+            self.store(key, write)
+            return points, descriptors
+
+        return np.load(os.path.join(path, 'points.npy')), np.load(os.path.join(path, 'descriptors.npy'))
+
+
+class OCRCache(DiskCache):
+    """
+    Cache of rectangles identified by OCR services, keyed by hash of the encoded image.
+    """
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_size=512):
+        super().__init__(os.path.join(directory, 'ocr'), max_size)
+
+    def load(self, digest, service):
+        """Load rectangles identified by the service
+
+        Args:
+            digest (str): hash of the encoded image
+            service (str): name of the service
+
+        Returns:
+            WordBoxes: identified rectangles or None if not cached
+        """
+        path = self.lookup(f'{digest}_{service}')
+        if path is None:
+            return None
+
+        with open(os.path.join(path, 'rectangles.json'), 'r') as f:
+            return WordBoxes.from_list(json.load(f))
+
+    def save(self, digest, service, rectangles):
+        """Store rectangles identified by the service
+
+        Args:
+            digest (str): hash of the encoded image
+            service (str): name of the service
+            rectangles (WordBoxes or list): identified rectangles
+        """
+        def write(directory):
+            with open(os.path.join(directory, 'rectangles.json'), 'w') as f:
+                json.dump(WordBoxes.from_rectangles(rectangles).tolist(), f, separators=(',', ':'))
+
+        self.store(f'{digest}_{service}', write)
+
+
+class HomographyStore:
+    """
+    Homographies shared by logsheets of one batch (kept only in memory).
+    The scan of the first logsheet of the batch aligned to each template is the reference tried first for the others,
+    so the results do not depend on the order in which the logsheets are processed.
+    """
+    def __init__(self, logsheets):
+        """
+        Args:
+            logsheets (list): scanned logsheet, template and config file of each page in order of the batch
+        """
+        self.references = dict()
+        for logsheet, template, config_file in logsheets:
+            if (template, config_file) not in self.references:
+                self.references[template, config_file] = {'owner': logsheet, 'ready': threading.Event(), 'homography': None}
+
+    def load(self, template, config_file, logsheet):
+        """Wait until the reference scan of the template is aligned
+
+        Args:
+            template (str): path to PDF template
+            config_file (str): path to JSON file containing config of the page
+            logsheet (str): path to scanned logsheet
+
+        Returns:
+            tuple: homography and its alignment score or None if not available (or the logsheet is the reference)
+        """
+        reference = self.references.get((template, config_file))
+        if reference is None or reference['owner'] == logsheet:
+            return None
+        reference['ready'].wait()
+        return reference['homography']
+
+    def save(self, template, config_file, logsheet, page):
+        """Store alignment of the reference scan, pages of other logsheets are ignored
+
+        Args:
+            template (str): path to PDF template
+            config_file (str): path to JSON file containing config of the page
+            logsheet (str): path to scanned logsheet
+            page (AlignedPage): accepted page or None if it was not aligned
+        """
+        reference = self.references.get((template, config_file))
+        if reference is None or reference['owner'] != logsheet or reference['ready'].is_set():
+            return
+        if page is not None and page.h is not None:
+            reference['homography'] = (page.h, page.score)
+        reference['ready'].set()
+
+    def release(self, logsheet):
+        """Stop waiting for alignments of the logsheet which were not stored (e.g. the logsheet failed)
+
+        Args:
+            logsheet (str): path to scanned logsheet
+        """
+        for reference in self.references.values():
+            if reference['owner'] == logsheet:
+                reference['ready'].set()
@@ -1,11 +1,10 @@
 import cv2
-from PIL import Image
-import io
 from skimage import filters, measure, morphology
 from skimage.filters import threshold_triangle
 from skimage.color import rgb2gray
 
-from libs.services.google_vision import GoogleVision
+from libs.pdf_to_image import EncodedImage, encode_image
+from libs.services.registry import get_client
 
 
 def extract_framebox(image):
@@ -95,12 +94,10 @@ def find_residuals(image, credentials):
         list: list of identified residuals
     """
 
-    google = GoogleVision(credentials)
+    google = get_client('google', credentials)
 
-    image_pil = Image.fromarray(image)
-    image_stream = io.BytesIO()
-    image_pil.save(image_stream, format='JPEG')
+    payload = EncodedImage(encode_image(image))
 
-    identified = google.annotate_image(image_stream)
+    identified = google.annotate_image(payload)
     identified = google.process_output(identified)
     return [rectangle.to_residual() for rectangle in identified]
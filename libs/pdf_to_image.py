@@ -1,4 +1,4 @@
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 import cv2
 from io import BytesIO
 from PIL import Image
@@ -6,7 +6,8 @@ from PIL import Image
 
 def convert_pdf_to_image(pdf_path, page=0, dpi=300):
     """
-    Convert PDF to image (assume only one page).
+    Convert single page of PDF to image.
+    Only the requested page is rasterized.
 
     Args:
         pdf_path (str): path to given PDF file
@@ -16,7 +17,57 @@ def convert_pdf_to_image(pdf_path, page=0, dpi=300):
     Returns:
         Image: converted image
     """
-    return convert_from_path(pdf_path, dpi=dpi)[page]
+    return convert_from_path(pdf_path, dpi=dpi, first_page=page+1, last_page=page+1)[0]
+
+
+def convert_pdf_pages(pdf_path, first_page=0, last_page=0, dpi=300):
+    """
+    Convert range of PDF pages to images at once (PDF is opened only once).
+    Pages beyond the end of PDF are ignored.
+
+    Args:
+        pdf_path (str): path to given PDF file
+        first_page (int): first page to be extracted. Defaults to 0.
+        last_page (int): last page to be extracted (inclusive). Defaults to 0.
+        dpi (int): quality of picture in DPI. Defaults to 300.
+
+    Returns:
+        list: converted images
+    """
+    return convert_from_path(pdf_path, dpi=dpi, first_page=first_page+1, last_page=last_page+1)
+
+
+def count_pdf_pages(pdf_path):
+    """
+    Find number of pages in PDF.
+
+    Args:
+        pdf_path (str): path to given PDF file
+
+    Returns:
+        int: number of pages
+    """
+    return pdfinfo_from_path(pdf_path)['Pages']
+
+
+def iterate_pdf_pages(pdf_path, first_page=0, last_page=None, dpi=300):
+    """
+    Convert range of PDF pages to images, one page at a time.
+
+    Args:
+        pdf_path (str): path to given PDF file
+        first_page (int): first page to be extracted. Defaults to 0.
+        last_page (int): last page to be extracted (inclusive). Defaults to the last page of PDF.
+        dpi (int): quality of picture in DPI. Defaults to 300.
+
+    Yields:
+        Image: converted image
+    """
+    if last_page is None:
+        last_page = count_pdf_pages(pdf_path) - 1
+
+    for page in range(first_page, last_page + 1):
+        yield convert_pdf_to_image(pdf_path, page, dpi=dpi)
 
 
 def resize_image(image, size):
@@ -33,16 +84,91 @@ def resize_image(image, size):
     return cv2.resize(image, size, interpolation = cv2.INTER_AREA)
 
 
-def get_image_size(logsheet_image):
-    """Find the size of the image
+class EncodedImage:
+    """
+    JPEG-encoded image shared by size checking and all OCR services.
+    """
+    def __init__(self, content, scale=1.0):
+        """
+        Args:
+            content (bytes): encoded image
+            scale (float, optional): factor used to scale the image before encoding. Defaults to 1.0.
+        """
+        self.content = content
+        self.size = len(content)
+        self.scale = scale
+
+    def stream(self):
+        """Provide file-like view of the content (the buffer is not copied)
+
+        Returns:
+            BytesIO: stream over the content
+        """
+        return BytesIO(self.content)
+
+
+def encode_image(image, quality=75):
+    """Encode image to JPEG
 
     Args:
-        logsheet_image (np.array): image of interest
+        image (np.array): image of interest
+        quality (int, optional): JPEG quality. Defaults to 75.
 
     Returns:
-        int: size in bytes
+        bytes: encoded image
     """
     img_file = BytesIO()
-    image = Image.fromarray(logsheet_image)
-    image.save(img_file, format='JPEG')
-    return img_file.tell()
+    Image.fromarray(image).save(img_file, format='JPEG', quality=quality)
+    return img_file.getvalue()
+
+
+def fit_image_size(image, max_size, max_quality=75, min_quality=40, min_scale=0.25):
+    """Encode image to JPEG not exceeding given size.
+
+    First the highest JPEG quality fitting the size is searched,
+    if even the lowest quality is too large, the image is downscaled.
+    The image is never rasterized again.
+
+    Args:
+        image (np.array): image of interest
+        max_size (int): maximal size in bytes
+        max_quality (int, optional): preferred JPEG quality. Defaults to 75.
+        min_quality (int, optional): lowest acceptable JPEG quality. Defaults to 40.
+        min_scale (float, optional): lowest acceptable downscale factor. Defaults to 0.25.
+
+    Raises:
+        ValueError: if the image cannot fit the size
+
+    Returns:
+        EncodedImage: encoded image with scale factor to map its coordinates to the original image
+    """
+    height, width = image.shape[:2]
+    scale = 1.0
+    scaled = image
+
+    while True:
+        content = encode_image(scaled, max_quality)
+        if len(content) <= max_size:
+            return EncodedImage(content, scale)
+
+        # binary search for the highest quality fitting the size
+        best = None
+        low, high = min_quality, max_quality - 1
+        while low <= high:
+            quality = (low + high) // 2
+            candidate = encode_image(scaled, quality)
+            if len(candidate) <= max_size:
+                best = candidate
+                low = quality + 1
+            else:
+                high = quality - 1
+
+        if best is not None:
+            return EncodedImage(best, scale)
+
+        if scale <= min_scale:
+            raise ValueError(f'Image cannot be encoded to fit {max_size} bytes.')
+
+        # JPEG size is roughly proportional to the number of pixels
+        scale = max(min_scale, scale * min(0.9, (max_size / len(content)) ** 0.5))
+        scaled = resize_image(image, (int(width * scale), int(height * scale)))
@@ -1,7 +1,10 @@
+import json
 import numpy as np
 import cv2
 from math import dist, isclose
 
+from libs.pdf_to_image import convert_pdf_to_image, resize_image
+
 
 def validate_corners(corners, height, width, tol=20):
     top_width = dist(corners[0], corners[1])
@@ -37,10 +40,17 @@ def compute_closest_point(point, corners):
     return corners[closest_index]
 
 
-def find_corners(image, filter_grayscale, num=10, gray_filter=20):
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    gray = cv2.GaussianBlur(gray, (5, 5), 0)
+def detect_contours(gray, filter_grayscale, gray_filter):
+    """Find contours in blurred grayscale image, sorted from the largest
+
+    Args:
+        gray (np.array): blurred grayscale image
+        filter_grayscale (bool): keep only the darkest pixels
+        gray_filter (int): threshold for the darkest pixels
 
+    Returns:
+        list: contours sorted by area
+    """
     if filter_grayscale:
         _, gray = cv2.threshold(gray, gray_filter, 255, cv2.THRESH_BINARY)
 
@@ -50,50 +60,271 @@ def find_corners(image, filter_grayscale, num=10, gray_filter=20):
     edged = cv2.erode(edged, None, iterations=1)
 
     # Find Contours
-    contours, _ = cv2.findContours(edged.copy(), cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
-    # take num of largest contours
-    contours = sorted(contours, key=cv2.contourArea, reverse=True)[:num]
+    contours, _ = cv2.findContours(edged, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+    return sorted(contours, key=cv2.contourArea, reverse=True)
 
-    box_points = []
 
-    for contour in contours:
-        rect = cv2.minAreaRect(contour)
-        bounding_box = cv2.boxPoints(rect)
-        box_points += list(np.int0(bounding_box))
+def draw_corners(image, box_points, outer_corners):
+    """Visualise candidate points (red) and selected corners (blue), can be used as debug hook of find_corners
 
+    Args:
+        image (np.array): given image
+        box_points (list): candidate points
+        outer_corners (list): selected corners
+
+    Returns:
+        np.array: annotated copy of the image
+    """
     copy_image = image.copy()
     for corner in box_points:
         copy_image = cv2.circle(copy_image, corner, radius=15, color=(0, 0, 255), thickness=15)
-    
-
-    # to determine image corner points
-    height, width, _ = image.shape
-
-    # Order of corners is top-left, top-right, bottom-right, bottom-left
-    outer_corners = [compute_closest_point((0, 0), box_points),
-                     compute_closest_point((width, 0), box_points),
-                     compute_closest_point((width, height), box_points),
-                     compute_closest_point((0, height), box_points)]
-    
     for corner in outer_corners:
         copy_image = cv2.circle(copy_image, corner, radius=15, color=(255, 0, 0), thickness=15)
+    return copy_image
+
+
+def downscale_image(image, factor):
+    """Downscale image keeping the darkest pixel of each block,
+    so that thin printed lines are preserved.
+
+    Args:
+        image (np.array): given image
+        factor (int): downscaling factor
+
+    Returns:
+        np.array: downscaled image
+    """
+    kernel = np.ones((factor, factor), np.uint8)
+    return cv2.erode(image, kernel, anchor=(0, 0))[::factor, ::factor]
+
+
+def find_corners(image, filter_grayscale, num=10, gray_filter=20, step=10, max_num=50, downscale=1, debug=None):
+    """Find corners of the main frame in the image.
+
+    If the corners are not valid, more candidate contours are considered
+    (and darker pixels are kept when filtering grayscale) in each attempt.
+    The contours are computed only once per threshold level.
+
+    With downscale, contours are detected in a downscaled image (coarse level)
+    and mapped back to full resolution before fitting the bounding boxes,
+    so the corners are not limited to the downscaled pixel grid.
 
-    corners_valid = validate_corners(outer_corners, height, width)
-    if not corners_valid and num < 50:
-        return find_corners(image, filter_grayscale, num=num+10, gray_filter=gray_filter+10)
+    Args:
+        image (np.array): given image
+        filter_grayscale (bool): keep only the darkest pixels
+        num (int, optional): number of the largest contours considered in the first attempt. Defaults to 10.
+        gray_filter (int, optional): threshold for the darkest pixels in the first attempt. Defaults to 20.
+        step (int, optional): increase of both values in each attempt. Defaults to 10.
+        max_num (int, optional): number of contours considered in the last attempt. Defaults to 50.
+        downscale (int, optional): factor of downscaling used for contour detection. Defaults to 1 (full resolution).
+        debug (callable, optional): called with image, candidate points and corners after each attempt. Defaults to None.
 
-    return outer_corners, corners_valid
+    Returns:
+        tuple: corners (top-left, top-right, bottom-right, bottom-left) and their validity
+    """
+    small = downscale_image(image, downscale) if downscale > 1 else image
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    gray = cv2.GaussianBlur(gray, (5, 5), 0)
+
+    # to determine image corner points
+    height, width = image.shape[:2]
+
+    contours = None
+    while True:
+        # without filtering, contours do not depend on the threshold
+        if contours is None or filter_grayscale:
+            contours = detect_contours(gray, filter_grayscale, gray_filter)
+            box_points = []
+            used = 0
+
+        # take num of largest contours, add only those not used yet
+        for contour in contours[used:num]:
+            if downscale > 1:
+                # centre of the block at full resolution
+                contour = (contour * downscale + (downscale - 1) / 2).astype(np.float32)
+            rect = cv2.minAreaRect(contour)
+            bounding_box = cv2.boxPoints(rect)
+            box_points += list(np.intp(bounding_box))
+        used = num
+
+        # Order of corners is top-left, top-right, bottom-right, bottom-left
+        outer_corners = [compute_closest_point((0, 0), box_points),
+                         compute_closest_point((width, 0), box_points),
+                         compute_closest_point((width, height), box_points),
+                         compute_closest_point((0, height), box_points)]
+
+        corners_valid = validate_corners(outer_corners, height, width)
+
+        if debug is not None:
+            debug(image, box_points, outer_corners)
 
+        if corners_valid or num >= max_num:
+            return outer_corners, corners_valid
 
-def transform(scanned, template, scanned_points, template_points):
-    # Compute the transformation matrix and apply it
+        num += step
+        gray_filter += step
+
+
+def compute_homography(scanned_points, template_points):
     h, _ = cv2.findHomography(np.array(scanned_points), np.array(template_points))
+    return h
+
+
+def warp_image(scanned, template, h):
     return cv2.warpPerspective(scanned, h, (template.shape[1], template.shape[0]))
 
 
-def align_images(scanned, template, filter_grayscale):
-    # Find corners in both images
-    template_corners, template_valid = find_corners(template, filter_grayscale)
-    scanned_corners, scanned_valid = find_corners(scanned, filter_grayscale)
-    if template_valid and scanned_valid:
-        return transform(scanned, template, scanned_corners, template_corners)
+def thumbnail(image, width, height=None):
+    """Compute small grayscale image with ink as high values
+
+    Args:
+        image (np.array): given image (color or grayscale)
+        width (int): minimal width of the thumbnail, its exact width if height is given
+        height (int, optional): exact height of the thumbnail. Defaults to None.
+
+    Returns:
+        tuple: thumbnail and its scale compared to the image (before resizing to the exact size)
+    """
+    image = np.asarray(image)
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+    # integer factor is considerably faster to compute
+    if height is None:
+        factor = max(1, gray.shape[1] // width)
+    else:
+        factor = max(1, min(gray.shape[1] // width, gray.shape[0] // height))
+    small = cv2.resize(gray, None, fx=1/factor, fy=1/factor, interpolation=cv2.INTER_AREA) if factor > 1 else gray
+    if height is not None and small.shape[:2] != (height, width):
+        small = cv2.resize(small, (width, height), interpolation=cv2.INTER_AREA)
+    return (255 - small).astype(np.float32), 1 / factor
+
+
+def alignment_score(scanned, template, h, width=256):
+    """Estimate how well the homography aligns scanned image to template,
+    computed as normalized cross-correlation of their warped thumbnails.
+
+    Args:
+        scanned (np.array): scanned image
+        template (np.array): template image
+        h (np.array): homography from scanned image to template
+        width (int, optional): width of the thumbnails. Defaults to 256.
+
+    Returns:
+        float: score between -1 and 1 (1 for perfect match)
+    """
+    scanned_small, scale = thumbnail(scanned, width)
+    template_small, _ = thumbnail(template, width)
+
+    # the same transformation in coordinates of the thumbnails
+    scaling = np.diag([scale, scale, 1])
+    h_small = scaling @ h @ np.linalg.inv(scaling)
+    warped = cv2.warpPerspective(scanned_small, h_small, (template_small.shape[1], template_small.shape[0]))
+
+    warped -= warped.mean()
+    template_small -= template_small.mean()
+    norm = np.sqrt(np.sum(warped ** 2) * np.sum(template_small ** 2))
+    return float(np.sum(warped * template_small) / norm) if norm > 0 else 0.0
+
+
+def save_homography(path, h, score=None):
+    """Store homography in JSON file
+
+    Args:
+        path (str): output file
+        h (np.array): homography from scanned image to template
+        score (float, optional): alignment score achieved by the homography. Defaults to None.
+    """
+    with open(path, 'w') as f:
+        json.dump({'homography': np.asarray(h).tolist(), 'score': score}, f)
+
+
+def load_homography(path):
+    """Load homography from JSON file
+
+    Args:
+        path (str): input file
+
+    Returns:
+        tuple: homography and its alignment score (None if unknown)
+    """
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return np.array(data['homography'], dtype=np.float64), data.get('score')
+
+
+def compute_features(image, max_features=5000):
+    """Detect ORB keypoints and compute their descriptors
+
+    Args:
+        image (np.array): given image
+        max_features (int, optional): maximal number of keypoints. Defaults to 5000.
+
+    Returns:
+        tuple: coordinates of keypoints (N x 2) and their descriptors (N x 32)
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    orb = cv2.ORB_create(nfeatures=max_features)
+    keypoints, descriptors = orb.detectAndCompute(gray, None)
+    points = np.array([keypoint.pt for keypoint in keypoints], dtype=np.float32).reshape(-1, 2)
+    return points, descriptors
+
+
+def match_features(scanned, template_features, ratio=0.75, min_matches=50):
+    """Find homography from scanned image to template by matching ORB keypoints, used when corners cannot be found
+
+    Args:
+        scanned (np.array): scanned image
+        template_features (tuple): precomputed keypoints and descriptors of the template
+        ratio (float, optional): maximal ratio of distances to the best and the second best match. Defaults to 0.75.
+        min_matches (int, optional): minimal number of matches consistent with the homography. Defaults to 50.
+
+    Returns:
+        np.array: homography or None if the images could not be matched
+    """
+    template_points, template_descriptors = template_features
+    scanned_points, scanned_descriptors = compute_features(scanned)
+    if scanned_descriptors is None or template_descriptors is None or len(template_descriptors) < 2:
+        return None
+
+    # keep only distinctive matches (Lowe's ratio test)
+    matcher = cv2.BFMatcher(cv2.NORM_HAMMING)
+    matches = [match for match in matcher.knnMatch(scanned_descriptors, template_descriptors, k=2) if len(match) == 2]
+    good = [best for best, second in matches if best.distance < ratio * second.distance]
+    if len(good) < min_matches:
+        return None
+
+    source = scanned_points[[match.queryIdx for match in good]]
+    destination = template_points[[match.trainIdx for match in good]]
+    h, mask = cv2.findHomography(source, destination, cv2.RANSAC, 5.0)
+    if h is None or mask.sum() < min_matches:
+        return None
+    return h
+
+
+def prepare_template(template, size, filter_grayscale, dpi=300, downscale=1):
+    """Rasterize template, resize it and find its corners
+
+    Args:
+        template (str): path to PDF template
+        size ((int, int)): target width and height of the image
+        filter_grayscale (bool): keep only the darkest pixels in grayscale during corner detection
+        dpi (int, optional): quality of picture in DPI. Defaults to 300.
+        downscale (int, optional): factor of downscaling used for corner detection. Defaults to 1.
+
+    Returns:
+        tuple: template image, its corners and their validity
+    """
+    template_image = np.array(convert_pdf_to_image(template, dpi=dpi))
+    template_image = resize_image(template_image, size)
+    template_corners, template_valid = find_corners(template_image, filter_grayscale, downscale=downscale)
+    return template_image, template_corners, template_valid
+
+
+def find_homography(scanned, template, filter_grayscale, template_corners=None, downscale=1):
+    # Find corners in both images (unless they are already known for the template)
+    if template_corners is None:
+        template_corners, template_valid = find_corners(template, filter_grayscale, downscale=downscale)
+        if not template_valid:
+            return None
+    scanned_corners, scanned_valid = find_corners(scanned, filter_grayscale, downscale=downscale)
+    if scanned_valid:
+        return compute_homography(scanned_corners, template_corners)
@@ -0,0 +1,110 @@
+import hashlib
+import numpy as np
+import cv2
+
+
+class MisalignedPageError(ValueError):
+    """
+    Raised when the page cannot be aligned with its template well enough.
+    """
+    def __init__(self, message, score=None):
+        super().__init__(message)
+        self.score = score
+
+
+class AlignedPage:
+    """
+    Scanned page in geometry of the template, warped lazily.
+
+    Fragments are warped individually through the homography and cached,
+    the whole page is warped only when it is actually needed (e.g. for OCR services).
+    Supports slicing as np.array, e.g. page[start_y:end_y, start_x:end_x].
+    """
+    def __init__(self, scanned, size, h=None, score=None):
+        """
+        Args:
+            scanned (np.array): scanned image (resized to the size of the template)
+            size ((int, int)): width and height of the template
+            h (np.array, optional): homography from scanned image to template, None if already aligned. Defaults to None.
+            score (float, optional): alignment score of the homography. Defaults to None.
+        """
+        self.scanned = scanned
+        self.width, self.height = size
+        self.h = h
+        self.score = score
+        self.fragments = dict()
+        self._image = None if h is not None else scanned
+        self._digest = None
+
+    @property
+    def shape(self):
+        return (self.height, self.width) + self.scanned.shape[2:]
+
+    @property
+    def image(self):
+        """Whole aligned page, warped on first access"""
+        if self._image is None:
+            self._image = cv2.warpPerspective(self.scanned, self.h, (self.width, self.height))
+            self.fragments.clear()
+        return self._image
+
+    def __array__(self, dtype=None, copy=None):
+        return self.image if dtype is None else self.image.astype(dtype)
+
+    def crop(self, start_x, start_y, end_x, end_y):
+        """Get fragment of aligned page
+
+        Args:
+            start_x (int): left coordinate
+            start_y (int): top coordinate
+            end_x (int): right coordinate (exclusive)
+            end_y (int): bottom coordinate (exclusive)
+
+        Returns:
+            np.array: the fragment
+        """
+        if self._image is not None:
+            return self._image[start_y:end_y, start_x:end_x]
+
+        key = (start_x, start_y, end_x, end_y)
+        if key not in self.fragments:
+            width, height = max(0, end_x - start_x), max(0, end_y - start_y)
+            if width == 0 or height == 0:
+                self.fragments[key] = np.empty((height, width) + self.scanned.shape[2:], dtype=self.scanned.dtype)
+            else:
+                # shift the homography so that the fragment starts at the origin
+                shift = np.array([[1, 0, -start_x], [0, 1, -start_y], [0, 0, 1]], dtype=np.float64)
+                self.fragments[key] = cv2.warpPerspective(self.scanned, shift @ self.h, (width, height))
+        return self.fragments[key]
+
+    def __getitem__(self, key):
+        rows, columns = key
+        start_y, end_y, _ = rows.indices(self.height)
+        start_x, end_x, _ = columns.indices(self.width)
+        return self.crop(start_x, start_y, end_x, end_y)
+
+    def digest(self):
+        """Identify the aligned page without warping it
+
+        Returns:
+            str: hexadecimal SHA-256 digest of scanned image, homography and size
+        """
+        if self._digest is None:
+            digest = hashlib.sha256(np.ascontiguousarray(self.scanned).data)
+            if self.h is not None:
+                digest.update(np.asarray(self.h, dtype=np.float64).tobytes())
+            digest.update(f'{self.width}x{self.height}'.encode())
+            self._digest = digest.hexdigest()
+        return self._digest
+
+    def warped(self):
+        """Warp the whole page and drop the scanned image (e.g. before passing the page to another process)
+
+        Returns:
+            AlignedPage: already aligned page with the same digest, homography and score
+        """
+        page = AlignedPage(self.image, (self.width, self.height), score=self.score)
+        # the homography is kept as information only (e.g. to be reused for other scans)
+        page.h = self.h
+        page._digest = self.digest()
+        return page
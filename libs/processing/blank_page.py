@@ -0,0 +1,48 @@
+import numpy as np
+
+from libs.processing.align_images import thumbnail
+
+
+class BlankPageError(ValueError):
+    """
+    Raised when the page does not contain any content.
+    """
+    pass
+
+
+def ink_ratio(image, width=256, margin=0.05):
+    """Estimate amount of ink on the page.
+    Computed on downsampled grayscale image, margins are ignored
+    as they often contain shadows from scanning.
+
+    Args:
+        image (np.array): given page
+        width (int, optional): width of downsampled image. Defaults to 256.
+        margin (float, optional): ignored part of the image on each side. Defaults to 0.05.
+
+    Returns:
+        float: average darkness relative to the background
+    """
+    height = max(1, round(width * image.shape[0] / image.shape[1]))
+    small, _ = thumbnail(image, width, height)
+
+    margin_y, margin_x = int(height * margin), int(width * margin)
+    small = small[margin_y:height-margin_y, margin_x:width-margin_x]
+
+    # the brightest part of the page is the background (paper)
+    background = np.percentile(small, 5)
+    return float(np.mean(np.clip(small - background, 0, None)) / max(255 - background, 1))
+
+
+def is_blank(image, template_image, relative_threshold=0.4):
+    """Decide whether the scanned page is blank
+
+    Args:
+        image (np.array): scanned page
+        template_image (np.array): template of the page
+        relative_threshold (float, optional): minimal amount of ink relative to the template. Defaults to 0.4.
+
+    Returns:
+        bool: True if the page is blank
+    """
+    return ink_ratio(image) < relative_threshold * ink_ratio(template_image)
@@ -0,0 +1,66 @@
+import cv2
+import numpy as np
+
+from libs.processing.align_images import thumbnail
+
+
+ROTATIONS = [None, cv2.ROTATE_90_CLOCKWISE, cv2.ROTATE_180, cv2.ROTATE_90_COUNTERCLOCKWISE]
+
+
+def ink_thumbnail(image, size):
+    """Downsample image to given size, ink has high values
+
+    Args:
+        image (np.array): given image
+        size ((int, int)): width and height of the thumbnail
+
+    Returns:
+        np.array: normalized thumbnail (zero mean, unit norm)
+    """
+    small, _ = thumbnail(image, *size)
+    small -= small.mean()
+    return small / max(float(np.linalg.norm(small)), 1e-6)
+
+
+def detect_rotation(image, template_image, width=64):
+    """Find rotation by multiple of 90 degrees which fits the scanned page best to its template,
+    computed as correlation of small thumbnails (only printed structure of the page matters).
+
+    Args:
+        image (np.array): scanned page
+        template_image (np.array): template of the page
+        width (int, optional): width of the thumbnails. Defaults to 64.
+
+    Returns:
+        int: rotation code for cv2.rotate or None if the page is upright
+    """
+    height = max(1, round(width * template_image.shape[0] / template_image.shape[1]))
+    template_small = ink_thumbnail(template_image, (width, height))
+
+    # downsample the scan only once, rotating the small image is cheap
+    scanned_small = ink_thumbnail(image, (height, width) if image.shape[1] > image.shape[0] else (width, height))
+
+    scores = []
+    for rotation in ROTATIONS:
+        rotated = scanned_small if rotation is None else cv2.rotate(scanned_small, rotation)
+        if rotated.shape != template_small.shape:
+            rotated = cv2.resize(rotated, (width, height), interpolation=cv2.INTER_AREA)
+        scores.append(float(np.sum(rotated * template_small)))
+
+    return ROTATIONS[int(np.argmax(scores))]
+
+
+def fix_orientation(image, template_image):
+    """Rotate scanned page upright (by multiple of 90 degrees)
+
+    Args:
+        image (np.array): scanned page
+        template_image (np.array): template of the page
+
+    Returns:
+        np.array: rotated page
+    """
+    rotation = detect_rotation(image, template_image)
+    if rotation is None:
+        return image
+    return cv2.rotate(image, rotation)
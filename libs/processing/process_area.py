@@ -1,7 +1,11 @@
-from Bio import pairwise2
+from Bio.Align import PairwiseAligner
 import numpy as np
 
 
+# global alignment: match 1, mismatch 0, gap opening -3 and extension -1 (end gaps included)
+ALIGNER = PairwiseAligner(mode='global', match_score=1, mismatch_score=0, open_gap_score=-3, extend_gap_score=-1)
+
+
 def is_a_number(string):
     """Polish given string and check if can be converted to float.
 
@@ -99,17 +103,25 @@ def construct_lines(lines):
 
 
 def align_pairwise(string_1, string_2):
-    """Align two strings
+    """Align two strings, only a single best alignment is computed
 
     Args:
         string_1 (str): first string
         string_2 (str): second string
 
     Returns:
-        str: aligned string
+        str: first string with gaps (spaces) inserted
     """
-    alignments = pairwise2.align.globalxs(string_1, string_2, -3, -1, gap_char=' ')
-    return alignments[0][0]
+    alignment = ALIGNER.align(string_1, string_2)[0]
+    coords_1, coords_2 = alignment.coordinates.tolist()
+
+    aligned = []
+    for i in range(1, len(coords_1)):
+        if coords_1[i] == coords_1[i - 1]:
+            aligned.append(' ' * (coords_2[i] - coords_2[i - 1]))
+        else:
+            aligned.append(string_1[coords_1[i - 1]:coords_1[i]])
+    return ''.join(aligned)
 
 
 def majority_vote(strings):
@@ -153,8 +165,7 @@ def remove_non_ascii(string):
 
 
 def identify_words(lines, is_number):
-    """Identify words from lines.
-    Behaves differently based on how many lines there are.
+    """Identify words from lines (one per service) by majority voting on aligned lines.
 
     Args:
         lines (list): given list of lines as strings
@@ -169,32 +180,23 @@ def identify_words(lines, is_number):
 
     if len(lines) == 1:
         return lines[0]
-    elif len(lines) == 2:
-        values = [align_pairwise(lines[0], lines[1]), 
-                  align_pairwise(lines[1], lines[0])]
-        if is_number:
-            number = identify_number(values)
-            if number is not None:
-                return number
-        return majority_vote(values)
-    elif len(lines) == 3:
+    elif len(lines) > 1:
+        # align each line with all the others (any number of services)
         values = []
         for i in range(len(lines)):
             this = lines[i]
-            other1 = lines[(i+1)%3]
-            other2 = lines[(i+2)%3]
-
-            align1 = align_pairwise(this, other1)
-            align2 = align_pairwise(this, other2)
+            aligned = [align_pairwise(this, lines[(i+j)%len(lines)]) for j in range(1, len(lines))]
 
-            result = align_pairwise(align1, align2)
+            result = aligned[0]
+            for other in aligned[1:]:
+                result = align_pairwise(result, other)
             values.append(result)
         if is_number:
             number = identify_number(values)
             if number is not None:
                 return number
         return majority_vote(values)
-    
+
 
 def filter_exceeding_words(lines, roi):
     """Filter regions exceeding bounds of ROI
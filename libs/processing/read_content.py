@@ -1,6 +1,6 @@
 from libs.processing.rtree import Ensemble
 from libs.processing.barcode import read_barcode
-from libs.processing.process_area import general_text_area
+from libs.processing.process_area import general_text_area, separate_to_lines, construct_lines, remove_non_ascii
 from libs.processing.checkbox import is_ticked
 
 
@@ -10,7 +10,7 @@ def process_content(indetified_content, logsheet_image, config, checkbox_edges):
 
     Args:
         indetified_content (dict): identified content using OCR services
-        logsheet_image (Image): logsheet image
+        logsheet_image (np.array or AlignedPage): aligned logsheet image
         config (LogsheetConfig): configuration of given logsheet
         checkbox_edges (bool): cutoff edges for checkboxes to avoid detecting box
 
@@ -45,3 +45,32 @@ def process_content(indetified_content, logsheet_image, config, checkbox_edges):
                                                                      int(rectangle.start_x):int(rectangle.end_x)]])
     
     return results, artefacts
+
+
+def content_agrees(identified_content, config):
+    """
+    Check whether given services agree on text in all Handwritten and Number ROIs.
+
+    Args:
+        identified_content (dict): identified content using (some of) OCR services
+        config (LogsheetConfig): configuration of given logsheet
+
+    Returns:
+        bool: True if the text is the same for all services
+    """
+    ensemble = Ensemble(identified_content, config)
+
+    for region in config.regions:
+        if region.content_type in ['Handwritten', 'Number']:
+            candidates = ensemble.find_intersection(region.get_coords())
+            texts = set()
+            for key in identified_content.keys():
+                lines = []
+                if candidates[key]:
+                    lines = separate_to_lines(candidates[key])
+                    for line in lines:
+                        line.sort()
+                texts.add(remove_non_ascii(construct_lines(lines)).strip())
+            if len(texts) > 1:
+                return False
+    return True
@@ -1,69 +1,170 @@
-from rtree import index
-from libs.region import Rectangle
+from functools import lru_cache
+import numpy as np
+
+from libs.region import WordBoxes
+
+
+def intersection_matrix(queries, coords):
+    """Find all intersections between two sets of rectangles at once (touching rectangles intersect)
+
+    Args:
+        queries (np.array): coordinates of R rectangles (R x 4)
+        coords (np.array): coordinates of W rectangles (W x 4)
+
+    Returns:
+        np.array: boolean matrix R x W
+    """
+    queries = queries[:, None, :]
+    coords = coords[None, :, :]
+    return ((coords[..., 0] <= queries[..., 2]) & (coords[..., 2] >= queries[..., 0]) &
+            (coords[..., 1] <= queries[..., 3]) & (coords[..., 3] >= queries[..., 1]))
+
+
+class ResidualIndex:
+    """
+    Residuals of a config compiled for pruning of identified rectangles,
+    shared by all services and all scans with the same config.
+    """
+    def __init__(self, residuals):
+        """
+        Args:
+            residuals (tuple): coordinates and expected content of each residual
+        """
+        self.coords = np.array([coords for coords, _ in residuals], dtype=np.float64).reshape(-1, 4)
+        self.expected_content = [content for _, content in residuals]
+        # residuals containing given text, each distinct text is compared only once
+        self.text_matches = dict()
+
+    def __len__(self):
+        return len(self.expected_content)
+
+    def match_text(self, content):
+        """Find residuals expecting given text
+
+        Args:
+            content (str): identified text
+
+        Returns:
+            np.array: boolean mask over residuals
+        """
+        matches = self.text_matches.get(content)
+        if matches is None:
+            matches = np.array([content in expected for expected in self.expected_content], dtype=bool)
+            self.text_matches[content] = matches
+        return matches
+
+    def residual_mask(self, words):
+        """Find words which are residuals, i.e. centered in a residual expecting their text
+
+        Args:
+            words (WordBoxes): words identified by single service
+
+        Returns:
+            np.array: boolean mask over words
+        """
+        centers_x, centers_y = words.centers[:, 0], words.centers[:, 1]
+        inside = ((self.coords[:, None, 0] <= centers_x) & (centers_x <= self.coords[:, None, 2]) &
+                  (self.coords[:, None, 1] <= centers_y) & (centers_y <= self.coords[:, None, 3]))
+        inside &= intersection_matrix(self.coords, words.coords)
+
+        # text is compared only for words placed in some residual, each distinct text once
+        candidates = np.flatnonzero(inside.any(axis=0))
+        mask = np.zeros(len(words), dtype=bool)
+        if len(candidates):
+            texts, text_indices = np.unique(words.boxes['text'][candidates], return_inverse=True)
+            matches = np.stack([self.match_text(words.texts[text]) for text in texts], axis=1)
+            mask[candidates] = (inside[:, candidates] & matches[:, text_indices]).any(axis=0)
+        return mask
+
+
+@lru_cache(maxsize=32)
+def _compile_residuals(residuals):
+    return ResidualIndex(residuals)
+
+
+def compile_residuals(residuals):
+    """Compile residuals into an index, the same residuals (e.g. of one config
+    used for a batch of scans) are compiled only once per process
+
+    Args:
+        residuals (list): list of Residual objects
+
+    Returns:
+        ResidualIndex: compiled residuals
+    """
+    return _compile_residuals(tuple((tuple(residual.get_coords()), residual.expected_content) for residual in residuals))
 
 
 class Ensemble:
+    """
+    Rectangles identified by any number of services, assigned to ROIs.
+    """
     def __init__(self, indetified_content, config):
-        self.google_rtree = RectangleTree(indetified_content['google'])
-        self.google_rtree.prune_residuals(config.residuals)
-        self.amazon_rtree = RectangleTree(indetified_content['amazon'])
-        self.amazon_rtree.prune_residuals(config.residuals)
-        self.azure_rtree = RectangleTree(indetified_content['azure'])
-        self.azure_rtree.prune_residuals(config.residuals)
+        residuals = compile_residuals(config.residuals)
+        self.trees = dict()
+        for key, content in indetified_content.items():
+            self.trees[key] = RectangleTree(content)
+            self.trees[key].prune_residuals(residuals)
+
+        # assign words to all ROIs in one shot, one row per region (ROIs may share coordinates)
+        coords = [tuple(region.get_coords()) for region in config.regions]
+        self.regions = dict()
+        for row, region in enumerate(coords):
+            self.regions.setdefault(region, row)
+        regions = np.array(coords, dtype=np.float64).reshape(-1, 4)
+        self.assignments = {key: tree.intersection_matrix(regions) for key, tree in self.trees.items()}
 
     def find_intersection(self, rectangle):
+        row = self.regions.get(tuple(rectangle))
         results = dict()
 
-        candidates = self.google_rtree.find_intersection(rectangle)
-        results['google'] = [Rectangle(*candidate.bbox, candidate.object) for candidate in candidates]
-        self.google_rtree.mark_rectangles(candidates)
-
-        candidates = self.amazon_rtree.find_intersection(rectangle)
-        results['amazon'] = [Rectangle(*candidate.bbox, candidate.object) for candidate in candidates]
-        self.amazon_rtree.mark_rectangles(candidates)
-
-        candidates = self.azure_rtree.find_intersection(rectangle)
-        results['azure'] = [Rectangle(*candidate.bbox, candidate.object) for candidate in candidates]
-        self.azure_rtree.mark_rectangles(candidates)
+        for key, tree in self.trees.items():
+            mask = self.assignments[key][row] if row is not None else tree.find_intersection(rectangle)
+            results[key] = tree.select(mask)
+            tree.mark_rectangles(mask)
 
         return results
-    
+
     def filter_artefacts(self):
-        google_remaining = self.google_rtree.filter_unused()
-        amazon_remaining = self.amazon_rtree.filter_unused()
-        azure_remaining = self.azure_rtree.filter_unused()
-        return {'google': google_remaining, 'amazon': amazon_remaining, 'azure': azure_remaining}
+        return {key: tree.filter_unused() for key, tree in self.trees.items()}
 
 
 class RectangleTree:
+    """
+    Rectangles identified by single service, stored as array of coordinates
+    so that intersections with many regions are computed at once.
+    """
     def __init__(self, content):
-        self.index = index.Index()
-        for i, roi in enumerate(content):
-            self.index.insert(i, roi.get_coords(), obj=roi.content)
-        self.used_rois = set()
-    
+        self.words = WordBoxes.from_rectangles(content)
+        self.coords = self.words.coords
+        self.present = np.ones(len(self.words), dtype=bool)
+        self.used = np.zeros(len(self.words), dtype=bool)
+
+    def intersection_matrix(self, rectangles):
+        """Find present rectangles intersecting each of given rectangles
+
+        Args:
+            rectangles (np.array): coordinates of rectangles (R x 4)
+
+        Returns:
+            np.array: boolean matrix R x number of rectangles
+        """
+        return intersection_matrix(rectangles, self.coords) & self.present
+
     def find_intersection(self, rectangle):
-        return list(self.index.intersection(rectangle, objects=True))
+        return self.intersection_matrix(np.array([rectangle], dtype=np.float64))[0]
+
+    def select(self, mask):
+        return self.words.select(np.flatnonzero(mask))
 
-    def mark_rectangles(self, rectangles):
-        for rectangle in rectangles:
-            self.used_rois.add(rectangle.id)
+    def mark_rectangles(self, mask):
+        self.used |= mask
 
     def prune_residuals(self, residuals):
-        for residual in residuals:
-            candidates = self.find_intersection(residual.get_coords())
-            for candidate in candidates:
-                x, y = (candidate.bbox[0] + candidate.bbox[2])/2, (candidate.bbox[1] + candidate.bbox[3])/2
-                if residual.point_is_inside(x, y):
-                    if candidate.object in residual.expected_content:
-                        self.index.delete(candidate.id, candidate.bbox)
-    
+        if not len(residuals) or not len(self.words):
+            return
+
+        self.present &= ~residuals.residual_mask(self.words)
+
     def filter_unused(self):
-        if self.index.get_size() != 0:
-            all_rectangles = list(self.index.intersection(self.index.get_bounds(), objects=True))
-            unused_rectangles = []
-            for item in all_rectangles:
-                if item.id not in self.used_rois:
-                    unused_rectangles.append(Rectangle(*item.bbox, item.object))
-            return unused_rectangles
-        return []
+        return self.select(self.present & ~self.used)
@@ -1,12 +1,14 @@
 import os
 import cv2
+import tempfile
 import xlsxwriter
 from shutil import rmtree
 
 
 def order_results(values):
+    # inferred value first, then values of the services in their order
     output = []
-    for key in ['inferred', 'google', 'amazon', 'azure']:
+    for key in ['inferred'] + [key for key in values.keys() if key != 'inferred']:
         value = values.get(key, None)
         if value:
             output.append(value)
@@ -36,7 +38,7 @@ def store_image(image, location, index):
     return filename
 
 
-def store_results(results, artefacts, output_file, include_validation=False):
+def store_results(results, artefacts, output_file, include_validation=False, alignment_scores=None):
     """
     Write identified results into an Excel sheet
 
@@ -45,13 +47,12 @@ def store_results(results, artefacts, output_file, include_validation=False):
         artefacts (dict): identified artefacts per service 
         output_file (str): path to the output xlsx file
         include_validation (bool): add value options to the output file
+        alignment_scores (dict): alignment score per page (None if the page was not aligned)
     """
-    # create directory to store mini images
-    directory = os.path.dirname(output_file)
-    images_directory = os.path.join(directory, 'images')
-
-    if not os.path.exists(images_directory):
-        os.makedirs(images_directory)
+    # create directory to store mini images (unique, multiple results can be stored to the same directory at once)
+    directory = os.path.dirname(os.path.abspath(output_file))
+    os.makedirs(directory, exist_ok=True)
+    images_directory = tempfile.mkdtemp(dir=directory, prefix='images_')
 
     # create a new Excel file and add a worksheet
     workbook = xlsxwriter.Workbook(output_file)
@@ -116,5 +117,15 @@ def store_results(results, artefacts, output_file, include_validation=False):
     extra_worksheet.set_column_pixels(1, 2, max_width)
     extra_worksheet.autofit()
 
+    # add quality of alignment
+    if alignment_scores:
+        alignment_worksheet = workbook.add_worksheet('Alignment')
+        alignment_worksheet.write('A1', 'Page')
+        alignment_worksheet.write('B1', 'Alignment score')
+        for row_number, (page, score) in enumerate(alignment_scores.items(), 2):
+            alignment_worksheet.write(f'A{row_number}', page)
+            alignment_worksheet.write(f'B{row_number}', score)
+        alignment_worksheet.autofit()
+
     workbook.close()
     rmtree(images_directory)
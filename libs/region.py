@@ -1,7 +1,12 @@
+import numpy as np
+
+
 class Region:
     """
     Class to represent single ROI
     """
+    __slots__ = ('start_x', 'start_y', 'end_x', 'end_y')
+
     def __init__(self, start_x, start_y, end_x, end_y):
         self.start_x = start_x
         self.start_y = start_y
@@ -56,6 +61,8 @@ class ROI(Region):
 
 
 class Rectangle(Region):
+    __slots__ = ('content', 'center_x', 'center_y', 'height')
+
     def __init__(self, start_x, start_y, end_x, end_y, content):
         super().__init__(start_x, start_y, end_x, end_y)
         self.content = content
@@ -78,4 +85,107 @@ class Rectangle(Region):
         return other.start_y <= self.center_y <= other.end_y
 
     def to_residual(self):
-        return Residual(*self.get_coords(), self.content)
+        # config stores pixel coordinates
+        return Residual(*[int(coord) for coord in self.get_coords()], self.content)
+
+
+WORD_BOX = np.dtype([('coords', np.float64, 4),
+                     ('center', np.float64, 2),
+                     ('height', np.float64),
+                     ('text', np.int32)])
+
+
+class WordBoxes:
+    """
+    Words identified by single service, stored column-wise in a structured array
+    (coordinates, center, height and index of the text). Distinct texts are stored only once.
+
+    Behaves as a sequence of Rectangles, these are created only for words actually accessed.
+    """
+    __slots__ = ('boxes', 'texts')
+
+    def __init__(self, coords=(), texts=()):
+        """
+        Args:
+            coords (list or np.array): top-left and bottom-right coordinates of each word (N x 4)
+            texts (list): text of each word
+        """
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 4)
+        indices = dict()
+        text_indices = [indices.setdefault(text, len(indices)) for text in texts]
+
+        self.texts = list(indices)
+        self.boxes = np.empty(len(coords), dtype=WORD_BOX)
+        self.set_coords(coords)
+        self.boxes['text'] = text_indices
+
+    @classmethod
+    def from_rectangles(cls, rectangles):
+        """Convert rectangles to word boxes (word boxes are returned as they are)
+
+        Args:
+            rectangles (list or WordBoxes): identified rectangles
+
+        Returns:
+            WordBoxes: the same words stored column-wise
+        """
+        if isinstance(rectangles, cls):
+            return rectangles
+        return cls([rectangle.get_coords() for rectangle in rectangles], [rectangle.content for rectangle in rectangles])
+
+    @classmethod
+    def from_list(cls, items):
+        return cls([item[:4] for item in items], [item[4] for item in items])
+
+    def tolist(self):
+        return [coords + [self.texts[text]] for coords, text in zip(self.boxes['coords'].tolist(), self.boxes['text'].tolist())]
+
+    def set_coords(self, coords):
+        self.boxes['coords'] = coords
+        self.boxes['center'] = (coords[:, :2] + coords[:, 2:]) / 2
+        self.boxes['height'] = coords[:, 3] - coords[:, 1]
+
+    @property
+    def coords(self):
+        return self.boxes['coords']
+
+    @property
+    def centers(self):
+        return self.boxes['center']
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __getitem__(self, index):
+        return self.select([index])[0]
+
+    def __iter__(self):
+        return iter(self.select(np.arange(len(self.boxes))))
+
+    def select(self, indices):
+        """Create rectangles for given words
+
+        Args:
+            indices (list or np.array): indices of the words
+
+        Returns:
+            list: list of Rectangles
+        """
+        coords = self.boxes['coords'][indices].tolist()
+        texts = self.boxes['text'][indices].tolist()
+        return [Rectangle(*box, self.texts[text]) for box, text in zip(coords, texts)]
+
+    def rescale(self, scale):
+        """Map words from scaled image back to the original image
+
+        Args:
+            scale (float): factor used to scale the image
+
+        Returns:
+            WordBoxes: words in coordinates of the original image
+        """
+        rescaled = WordBoxes()
+        rescaled.texts = self.texts
+        rescaled.boxes = self.boxes.copy()
+        rescaled.set_coords(self.coords / scale)
+        return rescaled
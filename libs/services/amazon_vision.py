@@ -1,22 +1,27 @@
+import json
 import boto3
 
-from libs.region import Rectangle
+from libs.region import WordBoxes
 
 
 class AmazonVision:
+    @staticmethod
+    def load_credentials(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+
     def __init__(self, amazon_credentials):
         self.client = boto3.client('textract',
                                    aws_access_key_id=amazon_credentials['ACCESS_KEY'],
                                    aws_secret_access_key=amazon_credentials['SECRET_KEY'],
                                    region_name=amazon_credentials['REGION'])
 
-    def annotate_image(self, image_stream):
-        image = image_stream.getvalue()
-        response = self.client.detect_document_text(Document={'Bytes': bytearray(image)})
+    def annotate_image(self, payload):
+        response = self.client.detect_document_text(Document={'Bytes': payload.content})
         return response
 
     def process_output(self, outputs, img_width, img_height):
-        identified = []
+        coords, texts = [], []
     
         # Iterate through detected items in the response
         for item in outputs.get('Blocks', []):
@@ -38,7 +43,13 @@ class AmazonVision:
                 top_left = [abs_left, abs_top]
                 bottom_right = [abs_left + abs_width, abs_top + abs_height]
                 
-                # Append the extracted data to the list
-                identified.append(Rectangle(*top_left, *bottom_right, text))
+                # Append the extracted data to the columns
+                coords.append(top_left + bottom_right)
+                texts.append(text)
         
-        return identified
+        return WordBoxes(coords, texts)
+
+    def identify(self, payload, config):
+        # Amazon reports relative coordinates
+        outputs = self.annotate_image(payload)
+        return self.process_output(outputs, config.width, config.height)
@@ -2,46 +2,122 @@ from azure.cognitiveservices.vision.computervision import ComputerVisionClient
 from msrest.authentication import CognitiveServicesCredentials
 from azure.cognitiveservices.vision.computervision.models import OperationStatusCodes
 from azure.cognitiveservices.vision.computervision.models._models_py3 import ComputerVisionOcrErrorException
+import json
 import time
 
-from libs.region import Rectangle
-from libs.services.utils import extract_corners
+from libs.region import WordBoxes
+from libs.services.utils import extract_corners, rescale_rectangles
+
+
+def backoff_delays(initial=0.1, factor=2, maximum=2):
+    """Generate exponentially growing delays between polls
+
+    Args:
+        initial (float, optional): first delay in seconds. Defaults to 0.1.
+        factor (float, optional): growth of the delay. Defaults to 2.
+        maximum (float, optional): maximal delay in seconds. Defaults to 2.
+
+    Yields:
+        float: delay in seconds
+    """
+    delay = initial
+    while True:
+        yield delay
+        delay = min(delay * factor, maximum)
+
+
+def retry_after(response, delay):
+    """Respect Retry-After header of the response if present
+
+    Args:
+        response (Response): HTTP response
+        delay (float): planned delay in seconds
+
+    Returns:
+        float: delay in seconds
+    """
+    try:
+        return max(delay, float(response.headers.get('Retry-After')))
+    except (TypeError, ValueError):
+        return delay
 
 
 class AzureVision:
+    @staticmethod
+    def load_credentials(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+
     def __init__(self, azure_credentials):
         credentials = CognitiveServicesCredentials(azure_credentials['SUBSCRIPTION_KEY'])
         self.client = ComputerVisionClient(endpoint=azure_credentials['ENDPOINT'], credentials=credentials)
 
-    def annotate_image(self, image_stream):
-        image_stream.seek(0)  # Rewind the stream to the beginning
-
+    def submit(self, payload):
         try:
-            rawHttpResponse = self.client.read_in_stream(image_stream, language='en', raw=True)
+            rawHttpResponse = self.client.read_in_stream(payload.stream(), language='en', raw=True)
         except ComputerVisionOcrErrorException as e:
             print(f'AzureVision error: {e.error}')
             # TODO # try lower DPI
-            return []
+            return None
 
         # Get ID from returned headers
         operationLocation = rawHttpResponse.headers['Operation-Location']
-        operationId = operationLocation.split('/')[-1]
-        
-        # SDK call
-        result = self.client.get_read_result(operationId)
+        return operationLocation.split('/')[-1]
+
+    def poll(self, operation_id):
+        """Ask for result of the read operation
+
+        Args:
+            operation_id (str): identifier of the read operation
 
-        while result.status != OperationStatusCodes.succeeded and result.status != OperationStatusCodes.failed:
-            time.sleep(1)  # To avoid making too many requests in a short time
-            result = self.client.get_read_result(operationId)
+        Returns:
+            tuple: result (None if still running) and raw HTTP response
+        """
+        rawHttpResponse = self.client.get_read_result(operation_id, raw=True)
+        result = rawHttpResponse.output
+        if result.status in [OperationStatusCodes.succeeded, OperationStatusCodes.failed]:
+            return result, rawHttpResponse.response
+        return None, rawHttpResponse.response
 
-        return result
+    def annotate_image(self, payload, max_wait=120):
+        """Submit the image and poll for result of the read operation
+
+        Args:
+            payload (EncodedImage): encoded image
+            max_wait (float, optional): maximal total time of polling in seconds. Defaults to 120.
+
+        Returns:
+            ReadOperationResult: result of the operation or None if it was not submitted or did not finish in time
+        """
+        operation_id = self.submit(payload)
+        if operation_id is None:
+            return None
+
+        deadline = time.monotonic() + max_wait
+        for delay in backoff_delays():
+            result, response = self.poll(operation_id)
+            if result is not None:
+                return result
+            delay = retry_after(response, delay)
+            if time.monotonic() + delay > deadline:
+                print(f'AzureVision error: read operation did not finish in {max_wait} s')
+                return None
+            time.sleep(delay)
 
     def process_output(self, outputs):
-        identified = []
+        coords, texts = [], []
         if outputs.status == OperationStatusCodes.succeeded:
             for line in outputs.analyze_result.read_results[0].lines:
                 for word in line.words:
                     vertices = word.bounding_box
                     start, end = extract_corners([vertices[0:2], vertices[4:6]])
-                    identified.append(Rectangle(*start, *end, word.text))
-        return identified
+                    coords.append(start + end)
+                    texts.append(word.text)
+        return WordBoxes(coords, texts)
+
+    def identify(self, payload, config):
+        outputs = self.annotate_image(payload)
+        if outputs is None or outputs.status != OperationStatusCodes.succeeded:
+            # the call failed, which is different from a page without any text
+            return None
+        return rescale_rectangles(self.process_output(outputs), payload.scale)
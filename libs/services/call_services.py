@@ -1,31 +1,144 @@
-from PIL import Image
-import io
+import time
+import hashlib
+import threading
+from functools import cache
+from concurrent.futures import Future, TimeoutError
 
-from libs.services.amazon_vision import AmazonVision
-from libs.services.azure_vision import AzureVision
-from libs.services.google_vision import GoogleVision
+from libs.processing.read_content import content_agrees
+from libs.services.registry import SERVICES, get_client
 
 
-def call_services(logsheet_image, credentials, config):
-    google = GoogleVision(credentials['google'])
-    amazon = AmazonVision(credentials['amazon'])
-    azure = AzureVision(credentials['azure'])
+def call_in_background(function, *args):
+    """Call function in a daemon thread.
+    Unlike threads of ThreadPoolExecutor, it is not joined at exit of the interpreter,
+    so a call which timed out is really abandoned.
 
-    image_pil = Image.fromarray(logsheet_image)
-    image_stream = io.BytesIO()
-    image_pil.save(image_stream, format='JPEG')
+    Args:
+        function (callable): called function
+        args: its arguments
 
-    google_identified = google.annotate_image(image_stream)
-    google_identified = google.process_output(google_identified)
+    Returns:
+        Future: result of the call
+    """
+    future = Future()
 
-    amazon_identified = amazon.annotate_image(image_stream)
-    amazon_identified = amazon.process_output(amazon_identified, config.width, config.height)
+    def run():
+        try:
+            future.set_result(function(*args))
+        except Exception as e:
+            future.set_exception(e)
 
-    azure_identified = azure.annotate_image(image_stream)
-    if azure_identified:
-        azure_identified = azure.process_output(azure_identified)
+    future.set_running_or_notify_cancel()
+    threading.Thread(target=run, daemon=True).start()
+    return future
 
-    return {'google': google_identified,
-            'amazon': amazon_identified,
-            'azure': azure_identified
-           }
+
+def identify_concurrently(clients, payload, config, timeout=120):
+    """Call given OCR services concurrently
+
+    Args:
+        clients (dict): client per service
+        payload (EncodedImage): encoded logsheet image
+        config (LogsheetConfig): configuration of given logsheet
+        timeout (float, optional): time limit in seconds for each service, None for no limit. Defaults to 120.
+
+    Returns:
+        tuple: identified rectangles per service and names of services which timed out or failed
+    """
+    identified = dict()
+    failed = set()
+    if not clients:
+        return identified, failed
+
+    futures = {name: call_in_background(client.identify, payload, config) for name, client in clients.items()}
+
+    start = time.monotonic()
+    for name, future in futures.items():
+        remaining = None if timeout is None else max(0, timeout - (time.monotonic() - start))
+        try:
+            identified[name] = future.result(timeout=remaining)
+        except TimeoutError:
+            print(f'{name} service timed out')
+            identified[name] = None
+        except Exception as e:
+            print(f'{name} service failed: {e}')
+            identified[name] = None
+
+        if identified[name] is None:
+            identified[name] = []
+            failed.add(name)
+
+    return identified, failed
+
+
+def call_services(payload, credentials, config, timeout=120, ocr_cache=None, replay=False, clients=None, quorum=False, digest=None,
+                  services=None):
+    """Call selected OCR services concurrently
+
+    Args:
+        payload (EncodedImage or callable): encoded logsheet image or function encoding it (called only if a service is needed)
+        credentials (dict): credentials per service
+        config (LogsheetConfig): configuration of given logsheet
+        timeout (float, optional): time limit in seconds for each service, None for no limit. Defaults to 120.
+        ocr_cache (OCRCache, optional): cache of previously identified content. Defaults to None.
+        replay (bool, optional): use only cached content, never call the services. Defaults to False.
+        clients (dict, optional): client per service used instead of the shared ones (e.g. replay clients). Defaults to None.
+        quorum (bool, optional): call remaining services only if the first two results disagree
+            (a service which timed out or failed is replaced by the next one). Defaults to False.
+        digest (str, optional): identifier of the image in OCR cache. Defaults to SHA-256 of the encoded image.
+        services (list, optional): names of services to be called (in order of preference). Defaults to all registered services.
+
+    Returns:
+        dict: identified rectangles per service (empty if the service timed out, failed or was not needed)
+    """
+    if services is None:
+        services = list(SERVICES)
+
+    identified = dict()
+    failed = set()
+    get_payload = cache(payload) if callable(payload) else lambda: payload
+    if digest is None:
+        digest = hashlib.sha256(get_payload().content).hexdigest()
+
+    for name in services:
+        if ocr_cache is not None:
+            cached = ocr_cache.load(digest, name)
+            if cached is not None:
+                identified[name] = cached
+        if replay and name not in identified:
+            print(f'{name} content not cached')
+            identified[name] = []
+            failed.add(name)
+
+    pending = [name for name in services if name not in identified]
+    if clients is None:
+        clients = {name: get_client(name, credentials[name]) for name in pending}
+
+    def identify(names):
+        if not names:
+            return
+        results, not_identified = identify_concurrently({name: clients[name] for name in names}, get_payload(), config, timeout)
+        # failed calls are not cached, they are repeated next time
+        if ocr_cache is not None:
+            for name in results.keys() - not_identified:
+                ocr_cache.save(digest, name, results[name])
+        identified.update(results)
+        failed.update(not_identified)
+
+    def answered():
+        return {name: identified[name] for name in services if name in identified and name not in failed}
+
+    if quorum:
+        # first reach two actual results (failed services do not count), the rest is needed only if they disagree
+        while pending and len(answered()) < 2:
+            first = pending[:2 - len(answered())]
+            identify(first)
+            pending = pending[len(first):]
+        if pending and content_agrees(answered(), config):
+            for name in pending:
+                identified[name] = []
+            pending = []
+
+    identify(pending)
+
+    return {name: identified[name] for name in services}
@@ -0,0 +1,96 @@
+import os
+import json
+import argparse
+import threading
+
+from libs.services.amazon_vision import AmazonVision
+from libs.services.azure_vision import AzureVision
+from libs.services.google_vision import GoogleVision
+
+
+# OCR engines available for the ensemble, each provides load_credentials(path) and identify(payload, config)
+# returning identified WordBoxes (None if the call failed)
+SERVICES = {'google': GoogleVision,
+            'amazon': AmazonVision,
+            'azure': AzureVision
+           }
+
+_clients = dict()
+_clients_pid = os.getpid()
+_lock = threading.Lock()
+
+
+def load_credentials(credential_files):
+    """Load credentials of given services
+
+    Args:
+        credential_files (dict): path to credentials per service
+
+    Returns:
+        dict: credentials per service
+    """
+    return {name: SERVICES[name].load_credentials(path) for name, path in credential_files.items()}
+
+
+def parse_credentials(value):
+    """Parse credentials of a service given as NAME=PATH (e.g. on command line)
+
+    Args:
+        value (str): name of the service and path to its credentials
+
+    Returns:
+        tuple: name of the service and path to its credentials
+    """
+    name, separator, path = value.partition('=')
+    if not separator or not path or name not in SERVICES:
+        raise ValueError(f'Expected NAME=PATH with NAME one of {", ".join(SERVICES)}.')
+    return name, path
+
+
+class CredentialsAlias(argparse.Action):
+    """
+    Former option of a single service (e.g. --google PATH), the same as --credentials google=PATH.
+    """
+    def __call__(self, parser, namespace, values, option_string=None):
+        credentials = list(getattr(namespace, self.dest) or [])
+        credentials.append((option_string.lstrip('-'), values))
+        setattr(namespace, self.dest, credentials)
+
+
+def add_credentials_arguments(group, not_needed):
+    """Add --credentials NAME=PATH and the former --google, --amazon and --azure options as its aliases
+
+    Args:
+        group (argparse._ArgumentGroup): group of optional arguments
+        not_needed (str): options which make the credentials unnecessary (e.g. --ocr_replay)
+    """
+    group.add_argument('--credentials', type=parse_credentials, nargs='+', action='extend', default=[], metavar='NAME=PATH',
+                       help=f'Credentials of each used OCR service ({", ".join(SERVICES)}), e.g. google=google.json (not needed with {not_needed})')
+    for name in ['google', 'amazon', 'azure']:
+        group.add_argument(f'--{name}', dest='credentials', action=CredentialsAlias, metavar='PATH', help=f'The same as --credentials {name}=PATH')
+
+
+def get_client(name, credentials):
+    """Get client of the service.
+    Each client is created once per process and credentials
+    and then shared across pages, runs and threads.
+
+    Args:
+        name (str): name of the service
+        credentials (str or dict): credentials of the service
+
+    Returns:
+        object: service client
+    """
+    global _clients_pid
+    key = (name, json.dumps(credentials, sort_keys=True))
+
+    with _lock:
+        # clients (their connections) must not be shared with forked processes
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+
+        if key not in _clients:
+            _clients[key] = SERVICES[name](credentials)
+        return _clients[key]
@@ -0,0 +1,55 @@
+import json
+import runpy
+
+from libs.region import WordBoxes
+
+
+def load_recordings(path):
+    """Load recorded outputs of OCR services
+
+    Recordings are stored either in JSON file or in Python module
+    defining EXTRACTED dictionary (see tests/extracted_content.py).
+
+    Args:
+        path (str): path to the recordings
+
+    Returns:
+        dict: recorded rectangles per logsheet and service
+    """
+    if path.endswith('.py'):
+        return runpy.run_path(path)['EXTRACTED']
+
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+class ReplayVision:
+    """
+    Serve recorded rectangles instead of calling the OCR service.
+    """
+    def __init__(self, recorded):
+        self.recorded = recorded
+
+    def annotate_image(self, payload):
+        return self.recorded
+
+    def process_output(self, outputs):
+        return WordBoxes([item['coords'] for item in outputs], [item['content'] for item in outputs])
+
+    def identify(self, payload, config):
+        # recordings are already in config space
+        return self.process_output(self.annotate_image(payload))
+
+
+def replay_clients(recordings, logsheet, services):
+    """Create replay clients serving recordings of given logsheet
+
+    Args:
+        recordings (dict): recorded rectangles per logsheet and service
+        logsheet (str): name of the recorded logsheet
+        services (iterable): names of services
+
+    Returns:
+        dict: replay client per service
+    """
+    return {name: ReplayVision(recordings[logsheet][f'REGIONS_{name.upper()}']) for name in services}
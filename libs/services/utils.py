@@ -13,3 +13,19 @@ def extract_corners(points):
     max_y = max(points, key=lambda pt: pt[1])[1]
     
     return (min_x, min_y), (max_x, max_y)
+
+
+
+def rescale_rectangles(rectangles, scale):
+    """Map rectangles from scaled image back to the original image
+
+    Args:
+        rectangles (WordBoxes): identified words
+        scale (float): factor used to scale the image
+
+    Returns:
+        WordBoxes: words in coordinates of the original image
+    """
+    if scale == 1:
+        return rectangles
+    return rectangles.rescale(scale)
@@ -1,16 +1,20 @@
-def compute_success_ratio(contents, artefacts):
+def compute_success_ratio(contents, artefacts, blank_backside=False, alignment_scores=None):
     """Compute ratio between number identified regions and extra content
 
     Args:
         contents (list): list of identified regions
         artefacts (dict): artefact per service
+        blank_backside (bool, optional): backside was detected as blank and skipped. Defaults to False.
+        alignment_scores (dict, optional): alignment score per page. Defaults to None.
 
     Returns:
         float: success ratio
     """
     num_of_identified = len(contents)
-    max_artefacts = max([len(items) for items in artefacts.values()])
+    max_artefacts = max([len(items) for items in artefacts.values()], default=0)
     ratio = num_of_identified/max(max_artefacts, 1) # to avoid division by zero
     return {'identified': num_of_identified, 
             'artefacts': max_artefacts, 
-            'ratio': ratio}
+            'ratio': ratio,
+            'blank_backside': blank_backside,
+            'alignment_scores': alignment_scores}
@@ -3,11 +3,10 @@ import numpy as np
 import argparse
 from PyPDF2 import PdfReader, PdfWriter
 import img2pdf
-from PIL import Image
 import io
 
-from libs.pdf_to_image import convert_pdf_to_image, resize_image
-from libs.processing.align_images import compute_closest_point, transform
+from libs.pdf_to_image import convert_pdf_to_image, resize_image, encode_image
+from libs.processing.align_images import compute_closest_point, compute_homography, warp_image, save_homography, load_homography
 
 
 def select_points(image, window_name):
@@ -42,18 +41,12 @@ def select_points(image, window_name):
 
 
 def to_pdf(image):
-    image_pil = Image.fromarray(image)
-    image_bytes = io.BytesIO()
-    image_pil.save(image_bytes, format='JPEG')
-    return img2pdf.convert(image_bytes.getvalue())
+    return img2pdf.convert(encode_image(image))
 
 
-def process(target, template, backside=False):
+def select_homography(target, template, backside=False):
     height, width, _ = target.shape
 
-    target = resize_image(target, (width, height))
-    template = resize_image(template, (width, height))
-
     # Display and select points on the template image
     window_name = 'TEMPLATE' + '(backside)' if backside else 'TEMPLATE'
     template_points = select_points(template.copy(), window_name)
@@ -75,28 +68,38 @@ def process(target, template, backside=False):
                      compute_closest_point((width, height), target_points),
                      compute_closest_point((0, height), target_points)]
 
-    # Align the images based on the selected points
-    return transform(target, template, target_points, template_points)
+    # Compute the alignment based on the selected points
+    return compute_homography(target_points, template_points)
+
+
+def process(target, template, backside=False, h=None):
+    height, width, _ = target.shape
+
+    target = resize_image(target, (width, height))
+    template = resize_image(template, (width, height))
+
+    if h is None:
+        h = select_homography(target, template, backside)
+
+    return warp_image(target, template, h), h
 
 
-def main(template_path, target_path, output_path, backside_template):
+def align_logsheet(target_path, output_path, template, backside_template=None, h=None, backside_h=None):
     output_pdf_writer = PdfWriter()
 
     # Convert PDF images to OpenCV format
-    template = np.array(convert_pdf_to_image(template_path))
     target = np.array(convert_pdf_to_image(target_path))
 
-    aligned_frontside = process(target, template)
+    aligned_frontside, h = process(target, template, h=h)
 
     frontside_pdf = to_pdf(aligned_frontside)
     frontside_pdf_reader = PdfReader(io.BytesIO(frontside_pdf))
     output_pdf_writer.add_page(frontside_pdf_reader.pages[0])
 
-    if backside_template:
-        template = np.array(convert_pdf_to_image(backside_template))
+    if backside_template is not None:
         target = np.array(convert_pdf_to_image(target_path, page=1))
 
-        aligned_backside = process(target, template, backside=True)
+        aligned_backside, backside_h = process(target, backside_template, backside=True, h=backside_h)
         backside_pdf = to_pdf(aligned_backside)
         backside_pdf_reader = PdfReader(io.BytesIO(backside_pdf))
         output_pdf_writer.add_page(backside_pdf_reader.pages[0])
@@ -108,6 +111,30 @@ def main(template_path, target_path, output_path, backside_template):
     with open(output_path, 'wb') as output_pdf:
         output_pdf_writer.write(output_pdf)
 
+    return h, backside_h
+
+
+def main(template_path, target_paths, output_paths, backside_template, homography=None, backside_homography=None,
+         save_homography_path=None, save_backside_homography_path=None):
+    template = np.array(convert_pdf_to_image(template_path))
+    if backside_template:
+        backside_template = np.array(convert_pdf_to_image(backside_template))
+    else:
+        backside_template = None
+
+    # apply saved transform (e.g. shared by pages from the same scanner batch) instead of selecting points
+    h = load_homography(homography)[0] if homography is not None else None
+    backside_h = load_homography(backside_homography)[0] if backside_homography is not None else None
+
+    # points are selected only once, the transform is applied to all the logsheets
+    for target_path, output_path in zip(target_paths, output_paths):
+        h, backside_h = align_logsheet(target_path, output_path, template, backside_template, h, backside_h)
+
+    if save_homography_path is not None:
+        save_homography(save_homography_path, h)
+    if save_backside_homography_path is not None and backside_h is not None:
+        save_homography(save_backside_homography_path, backside_h)
+
 
 if __name__ == '__main__':
     args_parser = argparse.ArgumentParser(description='Manual alignment tool for PDF files')
@@ -117,10 +144,19 @@ if __name__ == '__main__':
     optional = args_parser.add_argument_group('optional arguments')
 
     required.add_argument('--pdf_template', type=str, required=True, help='Path to the template PDF file')
-    required.add_argument('--pdf_logsheet', type=str, required=True, help='Path to the target PDF file')
-    required.add_argument('--output', type=str, required=True, help='Path to the output aligned image file')
+    required.add_argument('--pdf_logsheet', type=str, nargs='+', required=True, help='Path to the target PDF file (multiple files are aligned by the same transform)')
+    required.add_argument('--output', type=str, nargs='+', required=True, help='Path to the output aligned image file (one for each --pdf_logsheet)')
 
     optional.add_argument('--backside_template', type=str, help='PDF template of the backside')
+    optional.add_argument('--homography', type=str, help='Apply saved transform (JSON file, e.g. from process_logsheet.py --homography_dir) instead of selecting points')
+    optional.add_argument('--backside_homography', type=str, help='Apply saved transform (JSON file) to the backside instead of selecting points')
+    optional.add_argument('--save_homography', type=str, help='Save the transform to JSON file to be applied to other pages')
+    optional.add_argument('--save_backside_homography', type=str, help='Save the transform of the backside to JSON file to be applied to other pages')
 
     args = args_parser.parse_args()
-    main(args.pdf_template, args.pdf_logsheet, args.output, args.backside_template)
+
+    if len(args.pdf_logsheet) != len(args.output):
+        args_parser.error('Each --pdf_logsheet requires its own --output file.')
+
+    main(args.pdf_template, args.pdf_logsheet, args.output, args.backside_template, args.homography, args.backside_homography,
+         args.save_homography, args.save_backside_homography)
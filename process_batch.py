@@ -0,0 +1,174 @@
+import argparse
+import os
+import json
+import cv2
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import process_logsheet
+from libs.services.registry import add_credentials_arguments
+from libs.cache import HomographyStore
+
+
+def load_manifest(manifest_file):
+    """Load list of logsheets to be processed
+
+    Each item specifies pdf_logsheet, pdf_template, config_file and output_file,
+    optionally also backside_template and backside_config.
+
+    Args:
+        manifest_file (str): path to JSON file
+
+    Returns:
+        list: list of jobs
+    """
+    with open(manifest_file, 'r') as f:
+        return json.load(f)
+
+
+def collect_jobs(input_dir, template, config_file, output_dir, backside_template=None, backside_config=None):
+    """Create a job for each PDF in given directory, all sharing the same template and config
+
+    Args:
+        input_dir (str): directory with scanned logsheets
+        template (str): PDF template of the logsheets
+        config_file (str): path to JSON file containing config
+        output_dir (str): directory for output xlsx files
+        backside_template (str, optional): PDF template of the backside. Defaults to None.
+        backside_config (str, optional): path to JSON file containing config of the backside. Defaults to None.
+
+    Returns:
+        list: list of jobs
+    """
+    jobs = []
+    for filename in sorted(os.listdir(input_dir)):
+        name, extension = os.path.splitext(filename)
+        if extension.lower() == '.pdf':
+            jobs.append({'pdf_logsheet': os.path.join(input_dir, filename),
+                         'pdf_template': template,
+                         'config_file': config_file,
+                         'output_file': os.path.join(output_dir, f'{name}.xlsx'),
+                         'backside_template': backside_template,
+                         'backside_config': backside_config})
+    return jobs
+
+
+def init_worker():
+    # parallelism is provided by the processes
+    cv2.setNumThreads(1)
+
+
+def process_job(job, credentials, options, executor, homographies=None):
+    """Process single logsheet, OCR services are called on threads of the main process
+
+    Args:
+        job (dict): logsheet to be processed
+        credentials (dict): path to credentials per service
+        options (dict): options shared by all logsheets (keyword arguments of process_logsheet.main)
+        executor (ProcessPoolExecutor): worker processes running CPU-bound stages
+        homographies (HomographyStore, optional): alignments of reference scans of the batch. Defaults to None.
+
+    Returns:
+        dict: success ratio (None if the logsheet could not be processed)
+    """
+    try:
+        return process_logsheet.main(job['pdf_logsheet'], job['pdf_template'], job['config_file'], job['output_file'], credentials,
+                                     backside=bool(job.get('backside_template')), backside_template=job.get('backside_template'),
+                                     backside_config=job.get('backside_config'), executor=executor, homographies=homographies, **options)
+    finally:
+        if homographies is not None:
+            homographies.release(job['pdf_logsheet'])
+
+
+def main(jobs, credentials, options, workers, concurrent_jobs=None, reuse_homography=False):
+    """Process logsheets in a pool of processes
+
+    Worker processes only align pages and compute consensus of the services.
+    OCR services are called by threads of the main process, so more logsheets than workers
+    can wait for the services without occupying the processes.
+
+    Args:
+        jobs (list): logsheets to be processed
+        credentials (dict): path to credentials per service
+        options (dict): options shared by all logsheets (keyword arguments of process_logsheet.main)
+        workers (int): number of worker processes
+        concurrent_jobs (int, optional): number of logsheets processed at once. Defaults to 4 times workers.
+        reuse_homography (bool, optional): try the alignment of the first scan with the same template first. Defaults to False.
+
+    Returns:
+        dict: success ratio per output file
+    """
+    if concurrent_jobs is None:
+        concurrent_jobs = 4 * workers
+
+    # the first scan of each template in the batch is the reference for the others
+    homographies = None
+    if reuse_homography:
+        pages = []
+        for job in jobs:
+            pages.append((job['pdf_logsheet'], job['pdf_template'], job['config_file']))
+            if job.get('backside_template'):
+                pages.append((job['pdf_logsheet'], job['backside_template'], job['backside_config']))
+        homographies = HomographyStore(pages)
+
+    # workers are started on demand from threads of the jobs, forking a process with running threads may deadlock
+    context = multiprocessing.get_context('forkserver')
+
+    ratios = dict()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, mp_context=context) as executor, \
+         ThreadPoolExecutor(max_workers=concurrent_jobs) as threads:
+        futures = {threads.submit(process_job, job, credentials, options, executor, homographies): job['output_file'] for job in jobs}
+        for future in as_completed(futures):
+            output_file = futures[future]
+            try:
+                ratios[output_file] = future.result()
+            except Exception as e:
+                print(f'{output_file} failed: {e}')
+                ratios[output_file] = None
+            print(f'{output_file}: {ratios[output_file]}')
+    return ratios
+
+
+if __name__ == '__main__':
+    args_parser = argparse.ArgumentParser(description='Extract medatada from multiple logsheets.')
+
+    args_parser._action_groups.pop()
+    optional = args_parser.add_argument_group('optional arguments')
+
+    add_credentials_arguments(optional, '--ocr_replay')
+    optional.add_argument('--manifest', type=str, help='JSON file listing logsheets (pdf_logsheet, pdf_template, config_file, output_file, optionally backside_template and backside_config)')
+    optional.add_argument('--input_dir', type=str, help='Directory with scanned logsheets sharing the same template (alternative to --manifest)')
+    optional.add_argument('--pdf_template', type=str, help='PDF template of the logsheets in --input_dir')
+    optional.add_argument('--config_file', type=str, help='Path to JSON file containing config of the logsheets in --input_dir')
+    optional.add_argument('--output_dir', type=str, help='Directory for output xlsx files of the logsheets in --input_dir')
+    optional.add_argument('--backside_template', type=str, help='PDF template of the backside of the logsheets in --input_dir')
+    optional.add_argument('--backside_config', type=str, help='Path to JSON file containing config of the backside of the logsheets in --input_dir')
+
+    optional.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of worker processes (alignment and consensus).')
+    optional.add_argument('--concurrent_jobs', type=int, help='Number of logsheets processed at once, their OCR services are called from threads of the main process. Defaults to 4 times --workers.')
+    processing_options = process_logsheet.add_processing_arguments(optional)
+    optional.add_argument('--reuse_homography', action=argparse.BooleanOptionalAction, default=False, help='Try the alignment of the first scan with the same template in the batch first, scans from one batch usually share the same offsets.')
+
+    args = args_parser.parse_args()
+
+    if bool(args.manifest) == bool(args.input_dir):
+        args_parser.error('Exactly one of --manifest and --input_dir is required.')
+
+    if args.input_dir and (not args.pdf_template or not args.config_file or not args.output_dir):
+        args_parser.error('The --input_dir argument requires --pdf_template, --config_file and --output_dir.')
+
+    if bool(args.backside_template) != bool(args.backside_config):
+        args_parser.error('The --backside_template and --backside_config arguments must be used together.')
+
+    args.credentials = dict(args.credentials)
+    missing = [name for name in args.services if name not in args.credentials]
+    if not args.ocr_replay and missing:
+        args_parser.error(f'Credentials of the selected services are required (--credentials NAME=PATH): {", ".join(missing)} (unless --ocr_replay is used).')
+
+    if args.manifest:
+        jobs = load_manifest(args.manifest)
+    else:
+        jobs = collect_jobs(args.input_dir, args.pdf_template, args.config_file, args.output_dir, args.backside_template, args.backside_config)
+
+    options = {name: getattr(args, name) for name in processing_options}
+    main(jobs, args.credentials, options, args.workers, args.concurrent_jobs, args.reuse_homography)
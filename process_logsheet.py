@@ -1,105 +1,395 @@
+import os
 import argparse
 import numpy as np
-import json
+from concurrent.futures import ThreadPoolExecutor
 
-from libs.pdf_to_image import convert_pdf_to_image, resize_image
+from libs.pdf_to_image import convert_pdf_pages, resize_image, fit_image_size
 from libs.logsheet_config import LogsheetConfig
-from libs.processing.align_images import align_images
+from libs.processing.align_images import find_homography, match_features, alignment_score, compute_features, prepare_template, save_homography
+from libs.processing.aligned_page import AlignedPage, MisalignedPageError
+from libs.processing.blank_page import BlankPageError, is_blank
+from libs.processing.orientation import fix_orientation
 from libs.processing.read_content import process_content
 from libs.processing.store_results import store_results
 from libs.services.call_services import call_services
+from libs.services.registry import SERVICES, load_credentials, add_credentials_arguments
+from libs.services.replay_vision import load_recordings, replay_clients
 from libs.visualise_regions import annotate_pdfs
-from libs.pdf_to_image import get_image_size
 from libs.statistics import compute_success_ratio
+from libs.cache import TemplateCache, OCRCache, DEFAULT_CACHE_DIR
 
 
-def load_credentials(google_credentials, amazon_credentials, azure_credentials):
-    with open(amazon_credentials, 'r') as f:
-        amazon_credentials = json.load(f)
+def load_template(template, config, filter_grayscale, template_cache=None, dpi=300, alignment_downscale=1):
+    size = (config.width, config.height)
+    if template_cache is not None:
+        return template_cache.load(template, size, filter_grayscale, dpi=dpi, downscale=alignment_downscale)
+    return prepare_template(template, size, filter_grayscale, dpi=dpi, downscale=alignment_downscale)
 
-    with open(azure_credentials, 'r') as f:
-        azure_credentials = json.load(f)
 
-    return {'google': google_credentials, 'amazon': amazon_credentials, 'azure': azure_credentials}
+def load_template_features(template, template_image, template_cache=None, dpi=300):
+    if template_cache is not None:
+        return template_cache.load_features(template, template_image, dpi=dpi)
+    return compute_features(template_image)
 
 
-def preprocess_input(scanned_logsheet, template, config, page, skip_alignment, filter_grayscale, max_size=4, dpi=300):
-    # convert pdfs to images
-    template_image = convert_pdf_to_image(template, dpi=dpi)
-    template_image = np.array(template_image)
+def preprocess_input(logsheet_image, template, config, skip_alignment, filter_grayscale, dpi=300, template_cache=None, blank_threshold=None,
+                     alignment_downscale=1, feature_fallback=False, reference=None, reuse_tolerance=0.9,
+                     min_alignment_score=None, detect_orientation=False):
+    if not skip_alignment or blank_threshold is not None:
+        template_image, template_corners, template_valid = load_template(template, config, filter_grayscale, template_cache, dpi=dpi,
+                                                                         alignment_downscale=alignment_downscale)
 
-    logsheet_image = convert_pdf_to_image(scanned_logsheet, page, dpi=dpi)
-    logsheet_image = np.array(logsheet_image)
+    # skip pages without content before any expensive step
+    if blank_threshold is not None and is_blank(logsheet_image, template_image, blank_threshold):
+        raise BlankPageError('The page is blank.')
 
-    # resize images
-    logsheet_image = resize_image(logsheet_image, (config.width, config.height))
-    template_image = resize_image(template_image, (config.width, config.height))
+    # turn upside-down or sideways scans upright, otherwise corners cannot be found
+    if detect_orientation and not skip_alignment:
+        logsheet_image = fix_orientation(logsheet_image, template_image)
 
-    # fix logsheet_image (reorient and scale)
-    if not skip_alignment:
-        logsheet_image = align_images(logsheet_image, template_image, filter_grayscale)
+    # resize image
+    size = (config.width, config.height)
+    logsheet_image = resize_image(logsheet_image, size)
 
-    if logsheet_image is not None:
-        if get_image_size(logsheet_image) > max_size * 2**20:
-            logsheet_image = preprocess_input(scanned_logsheet, template, config, page, skip_alignment, filter_grayscale, max_size, dpi=dpi-50)
-        return logsheet_image
+    if skip_alignment:
+        return AlignedPage(logsheet_image, size)
 
+    # fix logsheet_image (reorient and scale), the page is warped lazily
+    h, score = None, None
 
-def process_logsheet(logsheet, template, config_file, credentials, debug=False, front=True, checkbox_edges=0.2, skip_alignment=False, filter_grayscale=False):
+    # scans from the same batch are usually shifted the same way, try the homography of the reference scan first
+    if reference is not None:
+        reference_h, reference_score = reference
+        score = alignment_score(logsheet_image, template_image, reference_h)
+        # it has to be almost as good as for the reference scan and also acceptable on its own
+        if score >= reuse_tolerance * reference_score and (min_alignment_score is None or score >= min_alignment_score):
+            h = reference_h
+
+    if h is None:
+        if template_valid:
+            h = find_homography(logsheet_image, template_image, filter_grayscale, template_corners, alignment_downscale)
+            if h is not None:
+                score = alignment_score(logsheet_image, template_image, h)
+
+        # corners could not be found (or do not fit), match keypoints with the template instead
+        if feature_fallback and (h is None or (min_alignment_score is not None and score < min_alignment_score)):
+            template_features = load_template_features(template, template_image, template_cache, dpi=dpi)
+            features_h = match_features(logsheet_image, template_features)
+            if features_h is not None:
+                features_score = alignment_score(logsheet_image, template_image, features_h)
+                if h is None or features_score > score:
+                    h, score = features_h, features_score
+
+    if h is None:
+        raise MisalignedPageError('The page cannot be aligned.')
+
+    # stop before calling OCR services if the page is misaligned (also when the previous homography was reused)
+    if min_alignment_score is not None and score < min_alignment_score:
+        raise MisalignedPageError(f'Alignment score {score:.2f} is below {min_alignment_score}, the page is skipped.', score)
+
+    return AlignedPage(logsheet_image, size, h, score)
+
+
+def prepare_page(logsheet_image, template, config_file, skip_alignment=False, filter_grayscale=False, template_cache=None,
+                 blank_threshold=None, alignment_downscale=1, feature_fallback=False, reference=None, min_alignment_score=None,
+                 detect_orientation=False):
+    """Align the page of scanned logsheet with its template
+
+    Args:
+        logsheet_image (np.array): rasterized page
+        template (str): path to PDF template of the page
+        config_file (str): path to JSON file containing config of the page
+        other arguments are passed to preprocess_input
+
+    Raises:
+        BlankPageError: if the page is blank
+        MisalignedPageError: if the page cannot be aligned with its template well enough
+
+    Returns:
+        tuple: aligned page and its config
+    """
     # load CSV config
     config = LogsheetConfig([], [])
     config.import_from_json(config_file)
 
-    page = 0 if front else 1
-
     # assume PDF and CSV config correspond to each other (QR codes are not reliable anyway)
-    logsheet_image = preprocess_input(logsheet, template, config, page, skip_alignment, filter_grayscale)
-    if logsheet_image is not None:
-    # call external OCR services
-        identified_content = call_services(logsheet_image, credentials, config)
+    page = preprocess_input(logsheet_image, template, config, skip_alignment, filter_grayscale, template_cache=template_cache,
+                            blank_threshold=blank_threshold, alignment_downscale=alignment_downscale,
+                            feature_fallback=feature_fallback, reference=reference, min_alignment_score=min_alignment_score,
+                            detect_orientation=detect_orientation)
+    return page, config
+
+
+def prepare_logsheet(scanned_logsheet, sides, max_size=None, **options):
+    """Rasterize pages of scanned logsheet (the PDF is opened once) and align them in parallel
+
+    Args:
+        scanned_logsheet (str): path to scanned logsheet in PDF format
+        sides (list): template, config file and specific options (e.g. blank_threshold) of each page, starting with the front side
+        max_size (int, optional): encode aligned pages for OCR services right away (maximal size in MB),
+            only the warped pages are kept then. Defaults to None (pages are encoded when needed).
+        options: options of all pages passed to prepare_page
+
+    Returns:
+        list: aligned page, its config and encoded image (or None) for each side, or the exception raised for the side (e.g. BlankPageError)
+    """
+    images = convert_pdf_pages(scanned_logsheet, 0, len(sides) - 1)
+
+    def prepare(page_number, side):
+        if page_number >= len(images):
+            return ValueError(f'Page {page_number + 1} is not present in {scanned_logsheet}.')
+        try:
+            page, config = prepare_page(np.array(images[page_number]), **side, **options)
+        except ValueError as e:
+            return e
+
+        payload = None
+        if max_size is not None:
+            # the whole page is warped for encoding anyway, consensus can use it as well
+            payload = encode_page(page, max_size)
+            page = page.warped()
+        return page, config, payload
+
+    with ThreadPoolExecutor(max_workers=len(sides)) as executor:
+        return list(executor.map(prepare, range(len(sides)), sides))
+
+
+def outcome(prepared):
+    """Get aligned page, its config and encoded image, raise the exception if the side could not be prepared"""
+    if isinstance(prepared, Exception):
+        raise prepared
+    return prepared
+
+
+def encode_page(page, max_size=4):
+    """Warp the whole aligned page and encode it for OCR services
+
+    Args:
+        page (AlignedPage): aligned page
+        max_size (int, optional): maximal size of the encoded image in MB. Defaults to 4.
+
+    Returns:
+        bytes: encoded image
+    """
+    # reduce its quality (or resolution) to fit the services' limit
+    return fit_image_size(page.image, max_size * 2**20)
+
+
+def identify_page(page, config, credentials, payload=None, max_size=4, service_timeout=120, ocr_cache=None, replay=False, clients=None,
+                  quorum=False, services=None):
+    """Identify content of aligned page by external OCR services
+
+    Args:
+        page (AlignedPage): aligned page
+        config (LogsheetConfig): configuration of the page
+        credentials (dict): credentials (or clients) of the services
+        payload (EncodedImage, optional): already encoded page. Defaults to None (encoded by the calling thread if needed).
+        max_size (int, optional): maximal size of image sent to the services in MB. Defaults to 4.
+        other arguments are passed to call_services
+
+    Returns:
+        dict: identified rectangles per service
+    """
+    # encode the image once (only if not cached)
+    def encode_payload():
+        if payload is not None:
+            return payload
+        return encode_page(page, max_size)
+
+    return call_services(encode_payload, credentials, config, service_timeout, ocr_cache, replay, clients, quorum,
+                         digest=f'{page.digest()}_{max_size}', services=services)
+
+
+def read_logsheet(pages, output_file, alignment_scores, blank_backside, checkbox_edges=0.2, debug=False):
+    """Extract contents of identified pages by consensus of the services and store them
 
+    Args:
+        pages (list): identified content, aligned page, config and whether it is the front side for each page
+        output_file (str): path to output xlsx file
+        alignment_scores (dict): alignment score of each side
+        blank_backside (bool): backside was skipped as blank
+        checkbox_edges (float, optional): fraction of checkbox edges ignored. Defaults to 0.2.
+        debug (bool, optional): output annotated PDF files. Defaults to False.
+
+    Returns:
+        dict: success ratio
+    """
+    contents, artefacts = [], dict()
+    for identified_content, page, config, front in pages:
         if debug:
-            annotate_pdfs(identified_content, logsheet_image, front)
+            annotate_pdfs(identified_content, page.image, front)
 
         # process contents
-        return process_content(identified_content, logsheet_image, config, checkbox_edges)
-    else:
-        return None, None
+        page_contents, page_artefacts = process_content(identified_content, page, config, checkbox_edges)
 
+        # join results
+        contents += page_contents
+        if not artefacts:
+            artefacts = page_artefacts
+        else:
+            for key in artefacts.keys():
+                artefacts[key] = artefacts[key] + page_artefacts[key]
 
-def main(scanned_logsheet, template, config_file, output_file, google_credentials, amazon_credentials, azure_credentials, 
-         debug, backside, backside_template, backside_config, ugly_checkboxes, aligned, filter_grayscale):
-    
+    ratio = compute_success_ratio(contents, artefacts, blank_backside, alignment_scores)
+
+    # store to Excel sheet
+    store_results(contents, artefacts, output_file, alignment_scores=alignment_scores)
+    return ratio
+
+
+def main(scanned_logsheet, template, config_file, output_file, credential_files,
+         debug=False, backside=False, backside_template=None, backside_config=None, ugly_checkboxes=False, aligned=False, filter_grayscale=False,
+         template_cache=True, cache_dir=DEFAULT_CACHE_DIR, cache_size=512, service_timeout=120, ocr_cache=True, ocr_replay=False,
+         replay_file=None, replay_logsheet=None, replay_backside=None, quorum=False, blank_threshold=0.4, alignment_downscale=1, feature_fallback=True,
+         min_alignment_score=0.3, detect_orientation=True, services=None, homography_dir=None, executor=None, homographies=None):
+    """Extract metadata from scanned logsheet and store them to xlsx file
+
+    CPU-bound stages (alignment, encoding and consensus) run on the given executor, e.g. a pool of processes
+    shared by multiple logsheets (see process_batch.py), OCR services are always called from threads of this process.
+    The remaining arguments correspond to the command line options.
+
+    Args:
+        executor (Executor, optional): pool running CPU-bound stages, the calling threads are used if None. Defaults to None.
+        homographies (HomographyStore, optional): alignments of reference scans shared by logsheets of one batch. Defaults to None.
+
+    Returns:
+        dict: success ratio
+    """
     checkbox_edges = 0.2
     if ugly_checkboxes:
         checkbox_edges = 0.4
     
-    credentials = load_credentials(google_credentials, amazon_credentials, azure_credentials)
-    
-    # extract contents from the front page
-    contents, artefacts = process_logsheet(scanned_logsheet, template, config_file, credentials, debug=debug, checkbox_edges=checkbox_edges, skip_alignment=aligned, filter_grayscale=filter_grayscale)
+    if services is None:
+        services = list(SERVICES)
 
-    if contents is not None:
-        # extract contents from the back side (if present)
+    # credentials are not needed when only cached or recorded content is used
+    credentials = None
+    if not ocr_replay and not replay_file:
+        credentials = load_credentials({name: credential_files[name] for name in services})
+
+    # serve recorded outputs of OCR services instead of calling them
+    clients, clients_back = None, None
+    if replay_file:
+        recordings = load_recordings(replay_file)
+        clients = replay_clients(recordings, replay_logsheet, services)
         if backside:
+            clients_back = replay_clients(recordings, replay_backside, services)
+        ocr_cache, ocr_replay = False, False
+
+    if template_cache:
+        template_cache = TemplateCache(cache_dir, cache_size)
+    else:
+        template_cache = None
+
+    if ocr_cache or ocr_replay:
+        ocr_cache = OCRCache(cache_dir, cache_size)
+    else:
+        ocr_cache = None
+
+    alignment_options = dict(skip_alignment=aligned, template_cache=template_cache, alignment_downscale=alignment_downscale,
+                             feature_fallback=feature_fallback, min_alignment_score=min_alignment_score, detect_orientation=detect_orientation)
+    max_size = 4
+    ocr_options = dict(max_size=max_size, service_timeout=service_timeout, ocr_cache=ocr_cache, replay=ocr_replay, quorum=quorum,
+                       services=services)
+
+    def run(function, *args, **kwargs):
+        if executor is None:
+            return function(*args, **kwargs)
+        return executor.submit(function, *args, **kwargs).result()
+
+    sides = [dict(template=template, config_file=config_file, filter_grayscale=filter_grayscale)]
+    if backside:
+        sides.append(dict(template=backside_template, config_file=backside_config, blank_threshold=blank_threshold))
+
+    # scans from one batch are usually shifted the same way, try the homography of the reference scan first
+    if homographies is not None:
+        for side in sides:
+            side['reference'] = homographies.load(side['template'], side['config_file'], scanned_logsheet)
+
+    # both sides are rasterized at once and aligned in parallel,
+    # in a pool of processes they are also encoded there, so that only the warped pages are passed between processes
+    prepared = run(prepare_logsheet, scanned_logsheet, sides, max_size=None if executor is None else max_size, **alignment_options)
+
+    # other logsheets may wait for the alignment of this one
+    if homographies is not None:
+        for side, side_prepared in zip(sides, prepared):
+            page = None if isinstance(side_prepared, Exception) else side_prepared[0]
+            homographies.save(side['template'], side['config_file'], scanned_logsheet, page)
+
+    # homographies of accepted pages can be applied to other scans by manual_align.py --homography
+    if homography_dir:
+        os.makedirs(homography_dir, exist_ok=True)
+        name = os.path.splitext(os.path.basename(scanned_logsheet))[0]
+        for side_name, side_prepared in zip(['front', 'back'], prepared):
+            if not isinstance(side_prepared, Exception) and side_prepared[0].h is not None:
+                page = side_prepared[0]
+                save_homography(os.path.join(homography_dir, f'{name}_{side_name}.json'), page.h, page.score)
+
+    with ThreadPoolExecutor(max_workers=2) as threads:
+        # OCR services are called only for accepted pages, the back side is skipped together with rejected front
+        identified_pages = []
+        alignment_scores = dict()
+        blank_backside = False
+        try:
+            page, config, payload = outcome(prepared[0])
+            alignment_scores['front'] = page.score
+            identified_pages.append((threads.submit(identify_page, page, config, credentials, payload, clients=clients, **ocr_options),
+                                     page, config, True))
+        except MisalignedPageError as e:
+            # only the score of the rejected page is stored
+            print(e)
+            alignment_scores['front'] = e.score
+            prepared = prepared[:1]
+
+        if len(prepared) > 1:
             try:
-                contents_back, artefacts_back = process_logsheet(scanned_logsheet, backside_template, backside_config, credentials,
-                                                                debug=debug, checkbox_edges=checkbox_edges, front=False, skip_alignment=aligned)
-                
-                if contents_back is not None:
-                    # join results
-                    contents += contents_back
-                    for key in artefacts.keys():
-                        artefacts[key] = artefacts[key] + artefacts_back[key]
+                page, config, payload = outcome(prepared[1])
+                alignment_scores['back'] = page.score
+                identified_pages.append((threads.submit(identify_page, page, config, credentials, payload, clients=clients_back, **ocr_options),
+                                         page, config, False))
+            except BlankPageError:
+                blank_backside = True
+            except MisalignedPageError as e:
+                print(e)
+                alignment_scores['back'] = e.score
             except ValueError:
-                # probably backside is present, but it is actually a blank page
+                # probably backside is not present or it is actually a blank page
                 pass
 
-        ratio = compute_success_ratio(contents, artefacts)
+        pages = [(future.result(), page, config, front) for future, page, config, front in identified_pages]
 
-        # store to Excel sheet
-        store_results(contents, artefacts, output_file)
-        return ratio
+    return run(read_logsheet, pages, output_file, alignment_scores, blank_backside, checkbox_edges, debug)
+
+
+def add_processing_arguments(group):
+    """Add options shared by process_logsheet.py and process_batch.py
+
+    Args:
+        group (argparse._ArgumentGroup): group of optional arguments
+
+    Returns:
+        list: names of the options, which are also keyword arguments of main
+    """
+    actions = [
+        group.add_argument('--ugly_checkboxes', action=argparse.BooleanOptionalAction, default=False, help='Checkboxes in the logsheet have irregular shape or large edges.'),
+        group.add_argument('--aligned', action=argparse.BooleanOptionalAction, default=False, help='The scanned image is already aligned with template, skip automatic alignment step.'),
+        group.add_argument('--filter_grayscale', action=argparse.BooleanOptionalAction, default=False, help='During the alignment step, keep only the darkest pixels in grayscale.'),
+        group.add_argument('--template_cache', action=argparse.BooleanOptionalAction, default=True, help='Cache rasterized templates and their corners on disk.'),
+        group.add_argument('--cache_dir', type=str, default=DEFAULT_CACHE_DIR, help='Directory used for caching.'),
+        group.add_argument('--cache_size', type=float, default=512, help='Maximal size of each cache in MB.'),
+        group.add_argument('--service_timeout', type=float, default=120, help='Time limit in seconds for each OCR service.'),
+        group.add_argument('--ocr_cache', action=argparse.BooleanOptionalAction, default=True, help='Cache content identified by OCR services on disk.'),
+        group.add_argument('--ocr_replay', action=argparse.BooleanOptionalAction, default=False, help='Use only cached content identified by OCR services, never call the services.'),
+        group.add_argument('--services', type=str, nargs='+', choices=list(SERVICES), default=list(SERVICES), help='OCR services used in the ensemble (in order of preference).'),
+        group.add_argument('--quorum', action=argparse.BooleanOptionalAction, default=False, help='Call the remaining OCR services only if the first two disagree on some text.'),
+        group.add_argument('--blank_threshold', type=float, default=0.4, help='Backside with less ink than this fraction of its template is considered blank and skipped.'),
+        group.add_argument('--alignment_downscale', type=int, default=1, help='Detect corners for the alignment step in image downscaled by this factor (e.g. 4 for faster coarse-to-fine alignment, 1 for full resolution).'),
+        group.add_argument('--feature_fallback', action=argparse.BooleanOptionalAction, default=True, help='If corners of the frame are not found, align the scanned image by matching keypoints with the template.'),
+        group.add_argument('--detect_orientation', action=argparse.BooleanOptionalAction, default=True, help='Turn upside-down or sideways scans upright before the alignment step.'),
+        group.add_argument('--min_alignment_score', type=float, default=0.3, help='Pages aligned with lower score (correlation with template, 1 is perfect) are skipped before calling OCR services.'),
+        group.add_argument('--homography_dir', type=str, help='Save homographies of accepted pages to this directory (<logsheet>_front.json, <logsheet>_back.json), they can be applied to other scans by manual_align.py --homography.'),
+    ]
+    return [action.dest for action in actions]
 
 
 if __name__ == '__main__':
@@ -114,22 +404,30 @@ if __name__ == '__main__':
     required.add_argument('--config_file', type=str, required=True, help='Path to JSON file containing config')
     required.add_argument('--output_file', type=str, required=True, help='Path to output xlsx file')
 
-    required.add_argument('--google', type=str, required=True, help='Path to Google vision credentials')
-    required.add_argument('--amazon', type=str, required=True, help='Path to Amazon vision credentials')
-    required.add_argument('--azure', type=str, required=True, help='Path to Azure vision credentials')
-
+    add_credentials_arguments(optional, '--ocr_replay or --replay_file')
     optional.add_argument('--debug', action=argparse.BooleanOptionalAction, default=False, help='Run in debug mode - output annotated PDF files.')
     optional.add_argument('--backside', action=argparse.BooleanOptionalAction, default=False, help='Backside page present.')
     optional.add_argument('--backside_template', type=str, help='PDF template of the backside')
     optional.add_argument('--backside_config', type=str, help='Path to JSON file containing config of the backside')
-    optional.add_argument('--ugly_checkboxes', action=argparse.BooleanOptionalAction, default=False, help='Checkboxes in the logsheet have irregular shape or large edges.')
-    optional.add_argument('--aligned', action=argparse.BooleanOptionalAction, default=False, help='The scanned image is already aligned with template, skip automatic alignment step.')
-    optional.add_argument('--filter_grayscale', action=argparse.BooleanOptionalAction, default=False, help='During the alignment step, keep only the darkest pixels in grayscale.')
+    processing_options = add_processing_arguments(optional)
+    optional.add_argument('--replay_file', type=str, help='Recorded outputs of OCR services (JSON or Python file, e.g. tests/extracted_content.py) used instead of calling the services.')
+    optional.add_argument('--replay_logsheet', type=str, help='Name of the recorded logsheet in --replay_file (e.g. CTD)')
+    optional.add_argument('--replay_backside', type=str, help='Name of the recorded backside in --replay_file (e.g. CTD_back)')
 
     args = args_parser.parse_args()
 
     if args.backside and (not args.backside_template or not args.backside_config):
         args_parser.error('The --backside argument requires --backside_template and --backside_config.')
 
-    main(args.pdf_logsheet, args.pdf_template, args.config_file, args.output_file, args.google, args.amazon, args.azure, 
-         args.debug, args.backside, args.backside_template, args.backside_config, args.ugly_checkboxes, args.aligned, args.filter_grayscale)
+    if args.replay_file and (not args.replay_logsheet or (args.backside and not args.replay_backside)):
+        args_parser.error('The --replay_file argument requires --replay_logsheet (and --replay_backside with --backside).')
+
+    credential_files = dict(args.credentials)
+    missing = [name for name in args.services if name not in credential_files]
+    if not args.ocr_replay and not args.replay_file and missing:
+        args_parser.error(f'Credentials of the selected services are required (--credentials NAME=PATH): {", ".join(missing)} (unless --ocr_replay or --replay_file is used).')
+
+    main(args.pdf_logsheet, args.pdf_template, args.config_file, args.output_file, credential_files,
+         debug=args.debug, backside=args.backside, backside_template=args.backside_template, backside_config=args.backside_config,
+         replay_file=args.replay_file, replay_logsheet=args.replay_logsheet, replay_backside=args.replay_backside,
+         **{name: getattr(args, name) for name in processing_options})
@@ -0,0 +1,80 @@
+import os
+import sys
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+from libs.logsheet_config import LogsheetConfig
+from libs.services.replay_vision import load_recordings, replay_clients
+
+
+# recorded logsheet and its config
+FIXTURES = {'CTD': 'config_front.json',
+            'CTD_back': 'config_back.json',
+            'TARA': 'config_tara.json'}
+
+
+def load_config(name):
+    config = LogsheetConfig([], [])
+    config.import_from_json(os.path.join(TESTS_DIR, 'config', FIXTURES[name]))
+    return config
+
+
+def draw_form(width=600, height=800):
+    """Synthetic form with a frame, table and a header (not symmetric under rotation)"""
+    import cv2
+    import numpy as np
+
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    cv2.rectangle(image, (60, 60), (width - 60, height - 60), (0, 0, 0), 6)
+    cv2.rectangle(image, (80, 80), (width // 2, 180), (0, 0, 0), -1)
+    for y in range(260, height - 100, 60):
+        cv2.line(image, (80, y), (width - 80, y), (0, 0, 0), 3)
+    cv2.line(image, (width // 3, 240), (width // 3, height - 100), (0, 0, 0), 3)
+    cv2.circle(image, (width - 140, 130), 40, (0, 0, 0), 5)
+    return image
+
+
+@pytest.fixture(scope='session')
+def recordings():
+    return load_recordings(os.path.join(TESTS_DIR, 'extracted_content.py'))
+
+
+@pytest.fixture
+def identified(recordings):
+    """Recorded content of all services for given logsheet"""
+    def identify(name, services=('google', 'amazon', 'azure')):
+        config = load_config(name)
+        clients = replay_clients(recordings, name, services)
+        return {service: client.identify(None, config) for service, client in clients.items()}, config
+    return identify
+
+
+@pytest.fixture(scope='session')
+def pdf_support():
+    """Skip tests rasterizing PDFs if poppler or zbar are not installed"""
+    pytest.importorskip('pyzbar.pyzbar', exc_type=ImportError)
+    from pdf2image.exceptions import PDFInfoNotInstalledError
+    from libs.pdf_to_image import convert_pdf_pages
+    try:
+        convert_pdf_pages(os.path.join(TESTS_DIR, 'template', 'back.pdf'), dpi=10)
+    except PDFInfoNotInstalledError:
+        pytest.skip('poppler is not installed')
+
+
+@pytest.fixture
+def run_logsheet(pdf_support, tmp_path):
+    """Process the recorded CTD logsheet (both sides) with given options"""
+    import process_logsheet
+
+    def run(**options):
+        output_file = str(tmp_path / 'results.xlsx')
+        ratio = process_logsheet.main(os.path.join(TESTS_DIR, 'logsheet', 'both.pdf'), os.path.join(TESTS_DIR, 'template', 'front.pdf'),
+                                      os.path.join(TESTS_DIR, 'config', 'config_front.json'), output_file, None,
+                                      False, True, os.path.join(TESTS_DIR, 'template', 'back.pdf'), os.path.join(TESTS_DIR, 'config', 'config_back.json'),
+                                      False, False, False, cache_dir=str(tmp_path / 'cache'),
+                                      replay_file=os.path.join(TESTS_DIR, 'extracted_content.py'), replay_logsheet='CTD', replay_backside='CTD_back',
+                                      **options)
+        return ratio, output_file
+    return run
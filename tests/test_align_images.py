@@ -0,0 +1,22 @@
+import cv2
+import numpy as np
+
+from conftest import draw_form
+from libs.processing.align_images import alignment_score
+
+
+def test_alignment_score():
+    template = draw_form()
+    shift = np.array([[1, 0, 40], [0, 1, 25], [0, 0, 1]], dtype=np.float64)
+    scanned = cv2.warpPerspective(template, shift, (600, 800), borderValue=(255, 255, 255))
+
+    assert alignment_score(template, template, np.eye(3)) > 0.99
+    aligned = alignment_score(scanned, template, np.linalg.inv(shift))
+    assert aligned > 0.9
+    assert alignment_score(scanned, template, np.eye(3)) < aligned - 0.3
+
+
+def test_alignment_score_of_blank_page():
+    template = draw_form()
+    blank = np.full_like(template, 255)
+    assert alignment_score(blank, template, np.eye(3)) == 0.0
@@ -0,0 +1,53 @@
+import cv2
+import numpy as np
+
+from conftest import draw_form
+from libs.processing.aligned_page import AlignedPage
+
+
+H = np.array([[0.98, 0.03, 12.3], [-0.02, 1.01, -7.6], [1e-5, 0, 1]])
+
+
+def same_pixels(fragment, expected):
+    # interpolation of shifted homography may round differently
+    return fragment.shape == expected.shape and np.abs(fragment.astype(int) - expected).max() <= 1
+
+
+def test_crop_matches_whole_warp():
+    scanned = draw_form()
+    page = AlignedPage(scanned, (600, 800), H)
+    warped = cv2.warpPerspective(scanned, H, (600, 800))
+
+    assert same_pixels(page.crop(50, 60, 250, 160), warped[60:160, 50:250])
+    assert same_pixels(page[300:420, 100:500], warped[300:420, 100:500])
+    assert page.crop(50, 60, 50, 160).shape == (100, 0, 3)
+    assert page.shape == warped.shape
+
+    # fragments are taken from the whole page once it is warped
+    assert np.array_equal(page.image, warped)
+    assert np.array_equal(page.crop(50, 60, 250, 160), warped[60:160, 50:250])
+
+
+def test_aligned_page_is_not_warped():
+    scanned = draw_form()
+    page = AlignedPage(scanned, (600, 800))
+    assert page.image is scanned
+    assert np.array_equal(page[100:200, 0:300], scanned[100:200, 0:300])
+
+
+def test_digest_identifies_alignment():
+    scanned = draw_form()
+    page = AlignedPage(scanned, (600, 800), H)
+    assert page.digest() == AlignedPage(scanned.copy(), (600, 800), H.copy()).digest()
+    assert page.digest() != AlignedPage(scanned, (600, 800)).digest()
+    assert page.digest() != AlignedPage(scanned, (600, 800), H * 1.01).digest()
+
+
+def test_warped_page_keeps_identity():
+    page = AlignedPage(draw_form(), (600, 800), H, 0.9)
+    warped = page.warped()
+    assert warped.digest() == page.digest()
+    assert warped.score == 0.9
+    assert warped.h is page.h
+    assert warped.image is page.image
+    assert np.array_equal(warped[300:420, 100:500], page.image[300:420, 100:500])
@@ -0,0 +1,21 @@
+import numpy as np
+
+from conftest import draw_form
+from libs.processing.blank_page import ink_ratio, is_blank
+
+
+def test_blank_page_is_detected():
+    form = draw_form()
+    blank = np.full_like(form, 250)
+    blank[100:103, 100:400] = 0
+    assert ink_ratio(blank) < ink_ratio(form)
+    assert is_blank(blank, form)
+    assert not is_blank(form, form)
+
+
+def test_margins_are_ignored():
+    blank = np.full((800, 600), 255, dtype=np.uint8)
+    # shadows at the edges of the scan
+    blank[:, :20] = 0
+    blank[-30:, :] = 0
+    assert ink_ratio(blank) == 0
@@ -0,0 +1,83 @@
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from libs.cache import DiskCache, TemplateCache, HomographyStore
+
+
+TEMPLATE = os.path.join(os.path.dirname(__file__), 'template', 'front.pdf')
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DiskCache(str(tmp_path), max_size=2.5 / 1024)
+
+    def write(directory):
+        with open(os.path.join(directory, 'data'), 'wb') as f:
+            f.write(bytes(1024))
+
+    for age, key in [(3, 'a'), (2, 'b')]:
+        path = cache.store(key, write)
+        os.utime(path, (os.path.getmtime(path) - age, ) * 2)
+    # the oldest entry is used again
+    assert cache.lookup('a') is not None
+
+    cache.store('c', write)
+    assert cache.lookup('b') is None
+    assert cache.lookup('a') is not None and cache.lookup('c') is not None
+    assert sorted(os.listdir(cache.directory)) == ['a', 'c']
+
+
+def test_features_without_keypoints_are_not_cached(tmp_path):
+    template_cache = TemplateCache(str(tmp_path))
+    blank = np.full((200, 100, 3), 255, dtype=np.uint8)
+
+    for _ in range(2):
+        points, descriptors = template_cache.load_features(TEMPLATE, blank)
+        assert len(points) == 0 and descriptors is None
+    assert os.listdir(template_cache.directory) == []
+
+
+def test_features_are_cached(tmp_path):
+    template_cache = TemplateCache(str(tmp_path))
+    image = np.full((400, 300, 3), 255, dtype=np.uint8)
+    image[100:300:20, 50:250] = 0
+    image[100:300, 50:250:20] = 0
+
+    points, descriptors = template_cache.load_features(TEMPLATE, image)
+    cached_points, cached_descriptors = template_cache.load_features(TEMPLATE, image)
+    assert len(points) > 0
+    assert np.array_equal(points, cached_points) and np.array_equal(descriptors, cached_descriptors)
+    assert len(os.listdir(template_cache.directory)) == 1
+
+
+class Page:
+    def __init__(self, h, score):
+        self.h = h
+        self.score = score
+
+
+def test_homography_of_first_logsheet_is_reference():
+    homographies = HomographyStore([('a.pdf', 'front.pdf', 'front.json'), ('b.pdf', 'front.pdf', 'front.json'),
+                                    ('b.pdf', 'back.pdf', 'back.json')])
+    assert homographies.load('front.pdf', 'front.json', 'a.pdf') is None
+
+    # only the first logsheet is stored, regardless of the order
+    with ThreadPoolExecutor() as executor:
+        future = executor.submit(homographies.load, 'front.pdf', 'front.json', 'b.pdf')
+        homographies.save('front.pdf', 'front.json', 'b.pdf', Page(np.eye(3) * 2, 0.9))
+        assert not future.done()
+        homographies.save('front.pdf', 'front.json', 'a.pdf', Page(np.eye(3), 0.8))
+        h, score = future.result(timeout=10)
+    assert np.array_equal(h, np.eye(3)) and score == 0.8
+
+
+def test_rejected_reference_is_not_reused():
+    homographies = HomographyStore([('a.pdf', 'front.pdf', 'front.json'), ('a.pdf', 'back.pdf', 'back.json'),
+                                    ('b.pdf', 'front.pdf', 'front.json'), ('b.pdf', 'back.pdf', 'back.json')])
+    homographies.save('front.pdf', 'front.json', 'a.pdf', None)
+    assert homographies.load('front.pdf', 'front.json', 'b.pdf') is None
+
+    # the backside of the first logsheet was never aligned
+    homographies.release('a.pdf')
+    assert homographies.load('back.pdf', 'back.json', 'b.pdf') is None
+    assert homographies.load('other.pdf', 'front.json', 'b.pdf') is None
@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import subprocess
+import pytest
+
+pytest.importorskip('pyzbar.pyzbar', exc_type=ImportError)
+
+from libs.cache import OCRCache
+from libs.region import WordBoxes
+from libs.services.call_services import call_services
+from conftest import TESTS_DIR
+
+
+class RecordedClient:
+    """Client serving given words, None stands for a failed call"""
+    def __init__(self, words, delay=0):
+        self.words = words
+        self.delay = delay
+        self.calls = 0
+
+    def identify(self, payload, config):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.words
+
+
+def test_failed_call_is_not_cached(tmp_path, identified):
+    content, config = identified('CTD', services=['google'])
+    ocr_cache = OCRCache(str(tmp_path))
+    clients = {'google': RecordedClient(content['google']), 'azure': RecordedClient(None)}
+
+    results = call_services(None, None, config, ocr_cache=ocr_cache, clients=clients, digest='page', services=['google', 'azure'])
+
+    assert len(results['google']) == len(content['google'])
+    assert len(results['azure']) == 0
+    assert ocr_cache.load('page', 'google') is not None
+    assert ocr_cache.load('page', 'azure') is None
+
+
+def test_empty_result_is_cached(tmp_path, identified):
+    _, config = identified('CTD')
+    ocr_cache = OCRCache(str(tmp_path))
+    call_services(None, None, config, ocr_cache=ocr_cache, clients={'azure': RecordedClient(WordBoxes())}, digest='page', services=['azure'])
+    assert len(ocr_cache.load('page', 'azure')) == 0
+
+
+@pytest.mark.parametrize('first, second', [('google', 'amazon'), ('amazon', 'google')])
+def test_quorum_skips_third_service_on_agreement(identified, first, second):
+    content, config = identified('CTD')
+    clients = {name: RecordedClient(content['google']) for name in ['google', 'amazon', 'azure']}
+
+    results = call_services(None, None, config, clients=clients, quorum=True, digest='page', services=[first, second, 'azure'])
+
+    assert clients['azure'].calls == 0
+    assert len(results['azure']) == 0
+    assert list(results) == [first, second, 'azure']
+
+
+@pytest.mark.parametrize('failing', [RecordedClient(None), RecordedClient(WordBoxes(), delay=1)])
+def test_quorum_replaces_failed_service(identified, failing):
+    content, config = identified('CTD')
+    clients = {'google': RecordedClient(content['google']), 'amazon': failing, 'azure': RecordedClient(content['azure'])}
+
+    results = call_services(None, None, config, timeout=0.2, clients=clients, quorum=True, digest='page')
+
+    assert clients['azure'].calls == 1
+    assert len(results['azure']) == len(content['azure'])
+
+
+def test_quorum_with_two_failures(identified):
+    _, config = identified('CTD')
+    clients = {name: RecordedClient(None) for name in ['google', 'amazon', 'azure']}
+
+    results = call_services(None, None, config, clients=clients, quorum=True, digest='page')
+
+    assert all(client.calls == 1 for client in clients.values())
+    assert all(len(words) == 0 for words in results.values())
+
+
+def test_quorum_replay_miss(tmp_path, identified):
+    content, config = identified('CTD')
+    ocr_cache = OCRCache(str(tmp_path))
+    ocr_cache.save('page', 'google', content['google'])
+
+    results = call_services(None, None, config, ocr_cache=ocr_cache, replay=True, quorum=True, clients={}, digest='page')
+
+    assert len(results['google']) == len(content['google'])
+    assert len(results['amazon']) == 0 and len(results['azure']) == 0
+
+
+def test_timed_out_service_is_abandoned(tmp_path):
+    # the interpreter must not wait for the abandoned call at exit
+    script = tmp_path / 'timeout.py'
+    script.write_text(f"""
+import sys, time
+sys.path.insert(0, {os.path.dirname(TESTS_DIR)!r})
+from libs.services.call_services import identify_concurrently
+
+class Stuck:
+    def identify(self, payload, config):
+        time.sleep(30)
+
+identified, failed = identify_concurrently({{'stuck': Stuck()}}, None, None, timeout=0.1)
+assert failed == {{'stuck'}}
+""")
+    start = time.monotonic()
+    subprocess.run([sys.executable, str(script)], check=True, timeout=20)
+    assert time.monotonic() - start < 10
@@ -0,0 +1,24 @@
+import cv2
+import numpy as np
+
+from conftest import draw_form
+from libs.processing.orientation import detect_rotation, fix_orientation
+
+
+INVERSE = {cv2.ROTATE_90_CLOCKWISE: cv2.ROTATE_90_COUNTERCLOCKWISE,
+           cv2.ROTATE_180: cv2.ROTATE_180,
+           cv2.ROTATE_90_COUNTERCLOCKWISE: cv2.ROTATE_90_CLOCKWISE}
+
+
+def test_upright_page():
+    form = draw_form()
+    assert detect_rotation(form, form) is None
+    assert fix_orientation(form, form) is form
+
+
+def test_rotated_page():
+    form = draw_form()
+    for rotation, inverse in INVERSE.items():
+        scanned = cv2.rotate(form, rotation)
+        assert detect_rotation(scanned, form) == inverse
+        assert np.array_equal(fix_orientation(scanned, form), form)
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from libs.pdf_to_image import fit_image_size, encode_image
+
+
+def noise(width=800, height=600):
+    return np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+def test_image_fits_at_preferred_quality():
+    image = np.full((600, 800, 3), 255, dtype=np.uint8)
+    encoded = fit_image_size(image, 2**20)
+    assert encoded.scale == 1.0
+    assert encoded.content == encode_image(image, 75)
+
+
+def test_quality_is_reduced_before_scale():
+    image = noise()
+    max_size = (len(encode_image(image, 50)) + len(encode_image(image, 75))) // 2
+    encoded = fit_image_size(image, max_size)
+    assert encoded.scale == 1.0
+    assert encoded.size <= max_size
+
+
+def test_image_is_downscaled():
+    image = noise()
+    max_size = len(encode_image(image, 40)) // 2
+    encoded = fit_image_size(image, max_size)
+    assert 0.25 <= encoded.scale < 1
+    assert encoded.size <= max_size
+
+
+def test_image_cannot_fit():
+    with pytest.raises(ValueError):
+        fit_image_size(noise(), 1000)
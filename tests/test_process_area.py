@@ -0,0 +1,30 @@
+import pytest
+
+from libs.processing.process_area import align_pairwise, identify_words, majority_vote
+
+
+def test_align_pairwise():
+    assert align_pairwise('12.5', '12.5') == '12.5'
+    assert align_pairwise('024', 'E624') in ['0 24', ' 024']
+    assert len(align_pairwise('Anna ITina/Ali', 'Anna / Tina / Ali')) == len('Anna / Tina / Ali')
+
+
+def test_majority_vote():
+    assert majority_vote(['abc', 'abd', 'xbc']) == 'abc'
+
+
+@pytest.mark.parametrize('lines, is_number, expected', [
+    (['12.5'], True, '12.5'),
+    (['12.5', '12.5'], True, '12.5'),
+    (['12.5', '12.5', '12.6'], True, '12.5'),
+    (['12.5', '12.5', '12.5', '12.6'], True, '12.5'),
+    (['Tina', 'Tina', 'Tino', 'Tina'], False, 'Tina'),
+    (['Tina', 'Tina', 'Tina', 'Tina', 'Tima'], False, 'Tina'),
+])
+def test_identify_words(lines, is_number, expected):
+    assert identify_words(lines, is_number) == expected
+
+
+def test_identify_words_ignores_empty_lines():
+    assert identify_words(['', '7', '7', ''], True) == '7'
+    assert identify_words([], True) is None
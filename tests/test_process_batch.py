@@ -0,0 +1,69 @@
+import os
+import numpy as np
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def batch_jobs(tmp_path):
+    return [{'pdf_logsheet': os.path.join(TESTS_DIR, 'logsheet', logsheet),
+             'pdf_template': os.path.join(TESTS_DIR, 'template', 'front.pdf'),
+             'config_file': os.path.join(TESTS_DIR, 'config', 'config_front.json'),
+             'output_file': str(tmp_path / f'{name}.xlsx'),
+             'backside_template': backside and os.path.join(TESTS_DIR, 'template', 'back.pdf'),
+             'backside_config': backside and os.path.join(TESTS_DIR, 'config', 'config_back.json')}
+            for name, logsheet, backside in [('front', 'front.pdf', None), ('both', 'both.pdf', True)]]
+
+
+def batch_options(tmp_path, **options):
+    # nothing is cached, so no service identifies anything
+    return {'cache_dir': str(tmp_path / 'cache'), 'ocr_replay': True, **options}
+
+
+def test_batch_calls_services_from_main_process(pdf_support, tmp_path, monkeypatch):
+    import process_batch
+    import process_logsheet
+
+    # calls made by worker processes would not be recorded here
+    callers = []
+
+    def call_services(*args, **kwargs):
+        callers.append(os.getpid())
+        return call_cached(*args, **kwargs)
+
+    call_cached = process_logsheet.call_services
+    monkeypatch.setattr(process_logsheet, 'call_services', call_services)
+
+    jobs = batch_jobs(tmp_path)
+    ratios = process_batch.main(jobs, None, batch_options(tmp_path), workers=2, concurrent_jobs=2)
+    front, both = ratios[jobs[0]['output_file']], ratios[jobs[1]['output_file']]
+    assert set(front['alignment_scores']) == {'front'}
+    assert set(both['alignment_scores']) == {'front', 'back'}
+    assert front['alignment_scores']['front'] == both['alignment_scores']['front']
+    assert all(os.path.isfile(job['output_file']) for job in jobs)
+    assert callers == [os.getpid()] * 3
+
+
+def test_batch_reuses_homography_of_first_logsheet(pdf_support, tmp_path):
+    import process_batch
+
+    jobs = batch_jobs(tmp_path)
+    ratios = process_batch.main(jobs, None, batch_options(tmp_path), workers=2)
+    reused = process_batch.main(jobs, None, batch_options(tmp_path), workers=2, reuse_homography=True)
+    # both logsheets contain the same scan of the front side
+    assert reused == ratios
+
+
+def test_batch_saves_homographies_of_accepted_pages(pdf_support, tmp_path):
+    import process_batch
+    from libs.processing.align_images import load_homography
+
+    homography_dir = tmp_path / 'homographies'
+    jobs = batch_jobs(tmp_path)
+    ratios = process_batch.main(jobs, None, batch_options(tmp_path, homography_dir=str(homography_dir)), workers=2)
+    assert sorted(os.listdir(homography_dir)) == ['both_back.json', 'both_front.json', 'front_front.json']
+
+    # homographies survive passing the warped pages between processes
+    h, score = load_homography(homography_dir / 'both_front.json')
+    assert h.shape == (3, 3)
+    assert score == ratios[jobs[1]['output_file']]['alignment_scores']['front']
+    assert np.allclose(load_homography(homography_dir / 'front_front.json')[0], h)
@@ -0,0 +1,82 @@
+import os
+import numpy as np
+
+
+def test_both_sides(run_logsheet):
+    ratio, output_file = run_logsheet()
+    assert ratio['identified'] == 41
+    assert set(ratio['alignment_scores']) == {'front', 'back'}
+    assert os.path.isfile(output_file)
+
+
+def test_rejected_front_keeps_score(run_logsheet):
+    ratio, output_file = run_logsheet(min_alignment_score=0.99)
+    assert ratio['identified'] == 0
+    assert 0 < ratio['alignment_scores']['front'] < 0.99
+    assert 'back' not in ratio['alignment_scores']
+    assert os.path.isfile(output_file)
+
+
+def test_rejected_back_keeps_score(run_logsheet):
+    # measure the scores first, then reject only the worse aligned back
+    scores = run_logsheet(feature_fallback=False)[0]['alignment_scores']
+    assert scores['back'] < scores['front']
+    threshold = (scores['front'] + scores['back']) / 2
+
+    ratio, output_file = run_logsheet(min_alignment_score=threshold, feature_fallback=False)
+    assert ratio['alignment_scores'] == scores
+    assert ratio['identified'] == 34
+    assert os.path.isfile(output_file)
+
+
+def test_rejected_front_skips_back_ocr(run_logsheet, monkeypatch):
+    import process_logsheet
+    identified = []
+
+    def call_services(encode_payload, credentials, config, *args, **kwargs):
+        identified.append(config)
+        return call_recorded(encode_payload, credentials, config, *args, **kwargs)
+
+    call_recorded = process_logsheet.call_services
+    monkeypatch.setattr(process_logsheet, 'call_services', call_services)
+
+    run_logsheet()
+    assert len(identified) == 2
+
+    identified.clear()
+    run_logsheet(min_alignment_score=0.99)
+    assert identified == []
+
+
+def test_reference_homography_below_threshold_is_not_reused(pdf_support):
+    from libs.pdf_to_image import convert_pdf_pages
+    from process_logsheet import preprocess_input
+    from conftest import TESTS_DIR, load_config
+
+    template = os.path.join(TESTS_DIR, 'template', 'front.pdf')
+    config = load_config('CTD')
+    scan = np.array(convert_pdf_pages(os.path.join(TESTS_DIR, 'logsheet', 'front.pdf'))[0])
+    page = preprocess_input(scan, template, config, False, False)
+
+    # shifted homography fits relative to the poor reference score, but not the absolute threshold
+    shifted = np.array([[1, 0, 150], [0, 1, 150], [0, 0, 1]], dtype=np.float64) @ page.h
+    reused = preprocess_input(scan, template, config, False, False, reference=(shifted, 0.01))
+    assert reused.score < page.score / 2
+    aligned = preprocess_input(scan, template, config, False, False, reference=(shifted, 0.01), min_alignment_score=page.score / 2)
+    assert np.array_equal(aligned.h, page.h) and aligned.score == page.score
+
+
+def test_both_sides_are_rasterized_at_once(run_logsheet, monkeypatch):
+    import process_logsheet
+    calls = []
+
+    def convert_pdf_pages(pdf_path, first_page=0, last_page=0, **kwargs):
+        calls.append((first_page, last_page))
+        return convert_all(pdf_path, first_page, last_page, **kwargs)
+
+    convert_all = process_logsheet.convert_pdf_pages
+    monkeypatch.setattr(process_logsheet, 'convert_pdf_pages', convert_pdf_pages)
+
+    ratio, _ = run_logsheet()
+    assert calls == [(0, 1)]
+    assert ratio['identified'] == 41
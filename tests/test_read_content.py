@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip('pyzbar.pyzbar', exc_type=ImportError)
+
+import numpy as np
+
+from libs.processing.read_content import process_content, content_agrees
+
+
+def blank_page(config):
+    return np.full((config.height, config.width, 3), 255, dtype=np.uint8)
+
+
+def inferred(contents):
+    return {varname: content['inferred'] for varname, content, _ in contents}
+
+
+def test_any_number_of_services(identified):
+    content, config = identified('CTD')
+    contents, artefacts = process_content(content, blank_page(config), config, 0.2)
+
+    # a fourth service agreeing with the first one must not change the consensus
+    content['fourth'] = content['google']
+    contents_4, artefacts_4 = process_content(content, blank_page(config), config, 0.2)
+
+    assert set(artefacts_4) == {'google', 'amazon', 'azure', 'fourth'}
+    for varname, value in inferred(contents_4).items():
+        if inferred(contents)[varname]:
+            assert value, varname
+
+
+def test_single_service(identified):
+    content, config = identified('CTD', services=['google'])
+    contents, artefacts = process_content(content, blank_page(config), config, 0.2)
+    assert set(artefacts) == {'google'}
+    assert any(inferred(contents).values())
+
+
+def test_content_agrees(identified):
+    content, config = identified('CTD')
+    assert content_agrees({'google': content['google'], 'copy': content['google']}, config)
+    assert not content_agrees({'google': content['google'], 'failed': []}, config)
+    assert not content_agrees(content, config)
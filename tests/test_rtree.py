@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from libs.processing.rtree import Ensemble, intersection_matrix, compile_residuals
+from libs.region import Residual, WordBoxes
+
+
+def overlaps(a, b):
+    return a[0] <= b[2] and a[2] >= b[0] and a[1] <= b[3] and a[3] >= b[1]
+
+
+def reference_assignment(identified, config):
+    """Assignment of words one by one (as done with R-tree)"""
+    results, artefacts = [], dict()
+    for key, words in identified.items():
+        present = []
+        for word in words:
+            coords = word.get_coords()
+            center = ((coords[0] + coords[2]) / 2, (coords[1] + coords[3]) / 2)
+            residual = any(residual.point_is_inside(*center) and overlaps(coords, residual.get_coords())
+                           and word.content in residual.expected_content for residual in config.residuals)
+            if not residual:
+                present.append(word)
+
+        used = set()
+        for i, region in enumerate(config.regions):
+            hits = [j for j, word in enumerate(present) if overlaps(word.get_coords(), region.get_coords())]
+            used.update(hits)
+            results.append((i, key, sorted(str(present[j]) for j in hits)))
+        artefacts[key] = sorted(str(word) for j, word in enumerate(present) if j not in used)
+    return sorted(results), artefacts
+
+
+@pytest.mark.parametrize('name', ['CTD', 'CTD_back', 'TARA'])
+def test_assignment_matches_reference(identified, name):
+    content, config = identified(name)
+    expected_results, expected_artefacts = reference_assignment(content, config)
+
+    ensemble = Ensemble(content, config)
+    results = []
+    for i, region in enumerate(config.regions):
+        for key, words in ensemble.find_intersection(region.get_coords()).items():
+            results.append((i, key, sorted(str(word) for word in words)))
+    artefacts = {key: sorted(str(word) for word in words) for key, words in ensemble.filter_artefacts().items()}
+
+    assert sorted(results) == expected_results
+    assert artefacts == expected_artefacts
+
+
+def test_duplicated_regions(identified):
+    content, config = identified('CTD')
+    config.regions.append(config.regions[0])
+
+    ensemble = Ensemble(content, config)
+    first = ensemble.find_intersection(config.regions[0].get_coords())
+    last = ensemble.find_intersection(config.regions[-1].get_coords())
+    assert {key: list(map(str, words)) for key, words in first.items()} == {key: list(map(str, words)) for key, words in last.items()}
+
+
+def test_unknown_region_is_queried(identified):
+    content, config = identified('CTD')
+    ensemble = Ensemble(content, config)
+    results = ensemble.find_intersection([0, 0, config.width, config.height])
+    assert sum(len(words) for words in results.values()) > 0
+
+
+def test_intersection_matrix_touching():
+    queries = np.array([[0, 0, 10, 10]], dtype=np.float64)
+    coords = np.array([[10, 10, 20, 20], [11, 0, 20, 10], [2, 2, 3, 3]], dtype=np.float64)
+    assert intersection_matrix(queries, coords).tolist() == [[True, False, True]]
+
+
+def test_residuals_are_pruned():
+    residuals = compile_residuals([Residual(0, 0, 100, 20, 'Station number')])
+    words = WordBoxes([[5, 5, 40, 15], [45, 5, 90, 15], [5, 30, 40, 40]], ['Station', '12', 'Station'])
+    assert residuals.residual_mask(words).tolist() == [True, False, False]
+    # compiled only once for the same residuals
+    assert compile_residuals([Residual(0, 0, 100, 20, 'Station number')]) is residuals
+
+
+def test_word_boxes():
+    words = WordBoxes([[0, 0, 10, 4], [5, 5, 7, 9], [1, 1, 2, 2]], ['a', 'b', 'a'])
+    assert words.texts == ['a', 'b']
+    assert [word.get_coords() + [word.content] for word in words] == [[0, 0, 10, 4, 'a'], [5, 5, 7, 9, 'b'], [1, 1, 2, 2, 'a']]
+    assert words[1].center_x == 6 and words[1].height == 4
+    assert words.rescale(2).tolist() == [[0, 0, 5, 2, 'a'], [2.5, 2.5, 3.5, 4.5, 'b'], [0.5, 0.5, 1, 1, 'a']]
+    assert WordBoxes.from_list(words.tolist()).tolist() == words.tolist()
+    assert len(WordBoxes.from_rectangles([])) == 0
@@ -0,0 +1,60 @@
+import json
+import argparse
+import time
+import pytest
+from types import SimpleNamespace
+
+from azure.cognitiveservices.vision.computervision.models import OperationStatusCodes
+
+from libs.services.azure_vision import AzureVision
+from libs.services.registry import SERVICES, load_credentials, parse_credentials, add_credentials_arguments
+
+
+def test_parse_credentials():
+    assert parse_credentials('google=keys/google.json') == ('google', 'keys/google.json')
+    for value in ['google', 'google=', 'unknown=path.json']:
+        with pytest.raises(ValueError):
+            parse_credentials(value)
+
+
+def test_load_credentials(tmp_path):
+    path = tmp_path / 'amazon.json'
+    path.write_text(json.dumps({'ACCESS_KEY': 'key'}))
+    credentials = load_credentials({'google': 'google.json', 'amazon': str(path)})
+    assert credentials == {'google': 'google.json', 'amazon': {'ACCESS_KEY': 'key'}}
+    assert set(credentials) <= set(SERVICES)
+
+
+class RunningOperation:
+    """Read operation of Azure which never finishes"""
+    def __init__(self):
+        self.polls = 0
+
+    def read_in_stream(self, stream, language, raw):
+        return SimpleNamespace(headers={'Operation-Location': 'https://azure/operations/42'})
+
+    def get_read_result(self, operation_id, raw):
+        self.polls += 1
+        return SimpleNamespace(output=SimpleNamespace(status=OperationStatusCodes.running), response=SimpleNamespace(headers={}))
+
+
+def test_azure_polling_is_limited():
+    azure = AzureVision.__new__(AzureVision)
+    azure.client = RunningOperation()
+    payload = SimpleNamespace(stream=lambda: None, scale=1.0)
+
+    start = time.monotonic()
+    assert azure.annotate_image(payload, max_wait=0.5) is None
+    assert time.monotonic() - start < 0.5
+    assert azure.client.polls > 1
+
+
+def test_credentials_arguments():
+    parser = argparse.ArgumentParser()
+    add_credentials_arguments(parser, '--ocr_replay')
+    assert parser.parse_args([]).credentials == []
+
+    args = parser.parse_args(['--azure', 'azure.json', '--credentials', 'google=google.json', 'amazon=amazon.json'])
+    assert dict(args.credentials) == {'google': 'google.json', 'amazon': 'amazon.json', 'azure': 'azure.json'}
+    args = parser.parse_args(['--credentials', 'google=google.json', '--google', 'other.json'])
+    assert dict(args.credentials) == {'google': 'other.json'}